@@ -0,0 +1,164 @@
+import concurrent.futures
+import functools
+import itertools
+import re
+from array import array
+
+from minesweeper import (Topology, _adjoining_function, _bit_count, _bytes_layer, _dilate, _game_state_grid,
+                         arrayboard, board)
+
+# maps a game state value to 1 for a clear cell and 0 otherwise, and to 1 for a numbered cell and 0 otherwise
+_CLEAR_BYTES = b"\x01" + bytes(255)
+_NUMBERED_BYTES = b"\x00" + b"\x01" * 8 + bytes(255 - 8)
+_RUN = re.compile(b"\x01+")
+
+
+def _find(parent: list, x: int):
+    ''' returns the root of x in a union-find forest, halving the path on the way '''
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def _union(parent: list, x: int, y: int):
+    x, y = _find(parent, x), _find(parent, y)
+    if x != y:
+        parent[max(x, y)] = min(x, y)
+
+
+def _label_runs(clear: bytes, rows: int, columns: int):
+    ''' labels the clear regions of a square board from the runs of clear cells of each row. Returns the runs as
+    (row, start, end) tuples and the union-find forest of the runs.
+    '''
+    runs, parent = [], []
+    # a run joins the runs of the row above that it touches, diagonals included
+    previous = []
+    for row in range(rows):
+        current = []
+        for match in _RUN.finditer(clear, row * columns, (row + 1) * columns):
+            start, end = match.start() - row * columns, match.end() - row * columns
+            current.append((start, end, len(runs)))
+            parent.append(len(runs))
+            runs.append((row, start, end))
+        i = j = 0
+        while i < len(previous) and j < len(current):
+            above_start, above_end, above = previous[i]
+            start, end, run = current[j]
+            if start <= above_end and above_start <= end:
+                _union(parent, above, run)
+            if above_end < end:
+                i += 1
+            else:
+                j += 1
+        previous = current
+    return runs, parent
+
+
+def _label_cells(clear: bytes, rows: int, columns: int, topology: Topology):
+    ''' labels the clear regions of a board of any topology, joining every clear cell to the clear cells adjoining
+    it that come before it. Returns the cells as runs of one, like _label_runs.
+    '''
+    adjoining = _adjoining_function(rows, columns, topology)
+    runs, parent, run_of = [], [], {}
+    for k in range(rows * columns):
+        if not clear[k]:
+            continue
+        run_of[k] = len(runs)
+        parent.append(len(runs))
+        runs.append((k // columns, k % columns, k % columns + 1))
+        for adj in adjoining(k):
+            if adj in run_of:
+                _union(parent, run_of[adj], run_of[k])
+    return runs, parent
+
+
+def _clear_cells(b: board):
+    ''' returns the game state grid of a board, and a byte per cell, 1 for a clear cell and 0 otherwise '''
+    rows, columns = b.rows(), b.columns()
+    mined = b._state_bytes()[0]
+    mine_cells = []
+    k = mined.find(1)
+    while k >= 0:
+        mine_cells.append(divmod(k, columns))
+        k = mined.find(1, k + 1)
+    grid = bytes(_game_state_grid(rows, columns, mine_cells, b._topology))
+    return grid, grid.translate(_CLEAR_BYTES)
+
+
+def label(b: board, clear: bytes = None):
+    ''' labels the clear regions of a board in one pass: the cells of the i-th region, in row major order of their
+    first cell, are labeled i, and all other cells 0. Returns the labels, an array with a label per cell in row
+    major order, and the number of cells of each region.
+    '''
+    rows, columns = b.rows(), b.columns()
+    if clear is None:
+        clear = _clear_cells(b)[1]
+    if b._topology == Topology.square:
+        runs, parent = _label_runs(clear, rows, columns)
+    else:
+        runs, parent = _label_cells(clear, rows, columns, b._topology)
+    labels = array('I', [0]) * (rows * columns)
+    sizes = []
+    region_of = {}
+    for run, (row, start, end) in enumerate(runs):
+        root = _find(parent, run)
+        if root not in region_of:
+            region_of[root] = len(sizes) + 1
+            sizes.append(0)
+        region = region_of[root]
+        sizes[region - 1] += end - start
+        labels[row * columns + start:row * columns + end] = array('I', [region]) * (end - start)
+    return labels, sizes
+
+
+def _isolated(grid: bytes, clear: bytes, rows: int, columns: int, topology: Topology):
+    ''' returns the number of numbered cells that adjoin no clear cell, so no opening opens them '''
+    numbered = grid.translate(_NUMBERED_BYTES)
+    if topology == Topology.square:
+        clear_layer = _bytes_layer(clear, columns)
+        return _bit_count(_bytes_layer(numbered, columns) & ~_dilate(clear_layer, columns + 1))
+    adjoining = _adjoining_function(rows, columns, topology)
+    return sum(1 for k in range(rows * columns) if numbered[k] and not any(clear[adj] for adj in adjoining(k)))
+
+
+def analyze(b: board):
+    ''' returns the difficulty metrics of a board as a dict:
+    - openings: the number of clear regions, each opened by a single click
+    - largest_region: the number of cells of the largest clear region
+    - isolated: the number of numbered cells that no opening opens, each needing a click of its own
+    - 3bv: the fewest clicks that clear the board, the openings plus the isolated numbered cells
+    '''
+    rows, columns = b.rows(), b.columns()
+    grid, clear = _clear_cells(b)
+    _, sizes = label(b, clear)
+    isolated = _isolated(grid, clear, rows, columns, b._topology)
+    return {
+        "openings": len(sizes),
+        "largest_region": max(sizes, default=0),
+        "isolated": isolated,
+        "3bv": len(sizes) + isolated,
+    }
+
+
+def _score(rows: int, columns: int, mines: int, seed: int):
+    return seed, analyze(arrayboard(rows, columns, mines, seed))
+
+
+def score(rows: int, columns: int, mines: int, seeds, executor=None, chunksize: int = 64):
+    ''' scores the boards generated from a stream of seeds across an executor, a process pool by default, and
+    yields (seed, metrics) in the order of the seeds. The board of a seed is the one arrayboard builds from it.
+    '''
+    owns_executor = executor is None
+    executor = executor or concurrent.futures.ProcessPoolExecutor()
+    seeds = iter(seeds)
+    try:
+        while True:
+            # seeds are read a few chunks ahead of the boards scored, so the stream can be unbounded
+            batch = list(itertools.islice(seeds, 16 * chunksize))
+            if not batch:
+                return
+            yield from executor.map(functools.partial(_score, rows, columns, mines), batch, chunksize=chunksize)
+    finally:
+        if owns_executor:
+            executor.shutdown()
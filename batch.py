@@ -0,0 +1,163 @@
+from minesweeper import (DisplayState, GameStatus, InvalidInputError, Move, MoveResult,
+                         _bit_positions, _cells_layer, _count_planes, _dilate, _fix_mines, _layer_bytes,
+                         _random_layer, _rng)
+
+
+class batch(object):
+    ''' batch plays many boards of the same shape in lockstep, a move per board at every step, to train and evaluate
+    strategies over many games at once. The boards are laid out one after the other in the layers of a bitboard:
+    one integer each for the mined, opened and flagged cells of all boards, and four bit planes for the numbers of
+    adjoining mines. Every board starts on a byte boundary and is followed by at least a row of padding bits, so
+    shifting a layer never carries a cell into another board.
+    Generating the boards, opening the cells and filling the clear regions of all boards are done with operations
+    on the whole layers; only reading and checking the moves is done board by board.
+    '''
+
+    def __init__(self, boards: int, rows: int, columns: int, mines: int, seed=None):
+        ''' initialize the specified number of boards with the rows, columns and mines. The seed is either an int
+        or a random.Random instance, so the same seed always gives the same boards.
+        '''
+        if rows <= 0 or columns <= 0 or not 0 <= mines <= rows * columns:
+            raise InvalidInputError("invalid board: {}x{} with {} mines".format(rows, columns, mines))
+        self._boards = boards
+        self._rows = rows
+        self._columns = columns
+        self._mines = mines
+        self._stride = columns + 1
+        self._width = ((rows + 1) * self._stride + 7) // 8  # bytes per board
+        self._block = 8 * self._width  # bits per board
+        self._board_cells = _cells_layer(rows, columns).to_bytes(self._width, "little")
+        self._cells = int.from_bytes(self._board_cells * boards, "little")
+
+        rng = _rng(seed)
+        mined = _random_layer(rng, self._cells, self._block * boards, mines / (rows * columns))
+        data = bytearray(mined.to_bytes(self._width * boards, "little"))
+        for b in range(boards):
+            _fix_mines(data, b * self._block, rows, columns, mines, rng)
+        self._mined = int.from_bytes(data, "little")
+        self._counts, self._clear = _count_planes(self._mined, self._cells, self._stride)
+
+        self._opened = self._flagged = 0
+        self._flags = [mines] * boards
+        self._statuses = bytearray(boards)  # GameStatus values
+
+    def boards(self):
+        return self._boards
+
+    def statuses(self):
+        ''' returns a bytearray with the GameStatus value of every board '''
+        return bytearray(self._statuses)
+
+    def flags(self):
+        ''' returns the number of flags remaining on every board '''
+        return list(self._flags)
+
+    def _state_bytes(self, b: int):
+        ''' returns two bytes objects with a byte per cell of the b-th board in row major order, as
+        board._state_bytes: 1 for a mined cell and 0 otherwise, and the display state value of the cell
+        '''
+        def layer(bits: int):
+            return _layer_bytes(bits >> b * self._block & (1 << self._block) - 1, self._rows, self._columns)
+
+        size = self._rows * self._columns
+        opened = int.from_bytes(layer(self._opened), "little")
+        flagged = int.from_bytes(layer(self._flagged), "little")
+        display_states = opened * DisplayState.opened.value | flagged * DisplayState.flagged.value
+        return layer(self._mined), display_states.to_bytes(size, "little")
+
+    def play(self, rows, cols, moves):
+        ''' applies a move to every board: the i-th items of rows, cols and moves are the row, column and Move of the
+        move on the i-th board. Moves follow board.try_move, without raising: every move gets a MoveResult, a mine
+        opened loses the board and reveals it, and moves on boards whose game is over result in
+        MoveResult.game_over. Returns a bytearray with the MoveResult value of every move, and a bytearray with
+        the GameStatus value of every board after the moves.
+        '''
+        size = self._width * self._boards
+        opened = self._opened.to_bytes(size, "little")
+        flagged = self._flagged.to_bytes(size, "little")
+        opens, flags, clears = bytearray(size), bytearray(size), bytearray(size)
+        results = bytearray(self._boards)
+        statuses, remaining = self._statuses, self._flags
+        n_rows, n_columns, stride, block = self._rows, self._columns, self._stride, self._block
+        game_over, invalid_cell, invalid_move, no_flags = (result.value for result in (
+            MoveResult.game_over, MoveResult.invalid_cell, MoveResult.invalid_move, MoveResult.no_flags))
+        open_move, clear_move = Move.open, Move.clear
+        k = -block
+        for b, row, col, move in zip(range(self._boards), rows, cols, moves):
+            k += block
+            if statuses[b]:
+                results[b] = game_over
+                continue
+            if not (0 <= row < n_rows and 0 <= col < n_columns):
+                results[b] = invalid_cell
+                continue
+            cell = k + row * stride + col
+            byte, bit = cell >> 3, 1 << (cell & 7)
+            if opened[byte] & bit:
+                results[b] = invalid_move
+            elif flagged[byte] & bit:
+                if move is clear_move:
+                    remaining[b] += 1
+                    clears[byte] |= bit
+                else:
+                    results[b] = invalid_move
+            elif move is open_move:
+                opens[byte] |= bit
+            elif move is clear_move:
+                results[b] = invalid_move
+            elif remaining[b] <= 0:
+                results[b] = no_flags
+            else:
+                remaining[b] -= 1
+                flags[byte] |= bit
+
+        self._flagged = (self._flagged | int.from_bytes(flags, "little")) & ~int.from_bytes(clears, "little")
+        opens = int.from_bytes(opens, "little")
+        hits = opens & self._mined
+        if hits:
+            # boards whose mine was opened are lost, and all their cells are opened
+            reveal = bytearray(size)
+            width = self._width
+            for k in _bit_positions(hits):
+                b = k // block
+                results[b] = MoveResult.mine.value
+                statuses[b] = GameStatus.lost.value
+                reveal[b * width:(b + 1) * width] = self._board_cells
+            reveal = int.from_bytes(reveal, "little")
+            self._opened |= reveal
+            self._flagged &= ~reveal
+            opens &= ~hits
+        if opens:
+            self._opened |= opens
+            self._open_adjoining_clear(opens & self._clear)
+        self._update_statuses()
+        return results, bytearray(statuses)
+
+    def _open_adjoining_clear(self, starts: int):
+        ''' opens the clear regions of the opened clear cells of all boards at once: the regions are grown a ring of
+        cells at a time until none of them grows, then the cells around them are opened with them
+        '''
+        if not starts:
+            return
+        stride = self._stride
+        closed = self._cells & ~(self._opened | self._flagged)
+        clear = self._clear & (closed | starts)
+        region = starts
+        while True:
+            grown = _dilate(region, stride) & clear
+            if grown == region:
+                break
+            region = grown
+        self._opened |= _dilate(region, stride) & closed
+
+    def _update_statuses(self):
+        ''' marks the boards in progress that have no flags left and no closed cells as won '''
+        if 0 not in self._flags:
+            return
+        candidates = [b for b, flags in enumerate(self._flags) if not flags and not self._statuses[b]]
+        width = self._width
+        closed = (self._cells & ~(self._opened | self._flagged)).to_bytes(width * self._boards, "little")
+        empty = bytes(width)
+        for b in candidates:
+            if closed[b * width:(b + 1) * width] == empty:
+                self._statuses[b] = GameStatus.won.value
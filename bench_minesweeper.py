@@ -0,0 +1,301 @@
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+import minesweeper
+
+# board sizes from the easy preset up to boards far larger than any preset
+SIZES = ((8, 10), (100, 100), (1000, 1000), (4000, 4000))
+DENSITIES = (0.1, 0.2)
+ENGINES = {
+    "board": minesweeper.board,
+    "arrayboard": minesweeper.arrayboard,
+    "bitboard": minesweeper.bitboard,
+}
+# boards with a cell object per position are not built beyond this size, they would take gigabytes
+MAX_CELL_OBJECTS = 1000 * 1000
+
+
+def _measure_memory(engine, rows: int, columns: int, mines: int):
+    ''' returns the peak memory, in bytes, allocated while building a board '''
+    tracemalloc.start()
+    b = engine(rows, columns, mines)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del b
+    return peak
+
+
+def _measure_moves(engine, rows: int, columns: int, mines: int):
+    ''' returns the number of flag and clear moves per second on a board '''
+    b = engine(rows, columns, mines)
+    b._flags = rows * columns
+    start = time.perf_counter()
+    for i in range(rows):
+        for j in range(columns):
+            b.try_move(i, j, minesweeper.Move.flag)
+            b.try_move(i, j, minesweeper.Move.clear)
+    elapsed = time.perf_counter() - start
+    return 2 * rows * columns / elapsed
+
+
+def compare_engines(sizes=((8, 10), (100, 100), (500, 500)), mines: int = 10):
+    ''' prints a memory and move throughput comparison of the board storage engines '''
+    print("{:>12} {:>12} {:>14} {:>14}".format(
+        "engine", "size", "bytes/cell", "moves/sec"))
+    for rows, columns in sizes:
+        for engine in (minesweeper.board, minesweeper.arrayboard):
+            peak = _measure_memory(engine, rows, columns, mines)
+            moves = _measure_moves(engine, rows, columns, mines)
+            print("{:>12} {:>12} {:>14.1f} {:>14.0f}".format(
+                engine.__name__, "{}x{}".format(rows, columns), peak / (rows * columns), moves))
+
+
+def _recursive_open_adjoining_clear(b: minesweeper.board, row: int, col: int):
+    ''' the recursive flood fill that board._open_adjoining_clear replaced, kept as a reference for timing '''
+    adjoining_cells = [
+        (row-1, col-1), (row-1, col), (row-1, col+1),
+        (row, col-1), (row, col+1),
+        (row+1, col-1), (row+1, col), (row+1, col+1),
+    ]
+
+    valid_cells = list(filter(lambda t: t[0] >= 0 and t[0] <
+                              b._rows and t[1] >= 0 and t[1] < b._columns, adjoining_cells))
+    for adj_row, adj_col in valid_cells:
+        if b._get_display_state(adj_row, adj_col) != minesweeper.DisplayState.closed:
+            continue
+        adj_game_state = b._get_game_state(adj_row, adj_col)
+        if adj_game_state != minesweeper.GameState.mined:
+            b._set_display_state(adj_row, adj_col,
+                                 minesweeper.DisplayState.opened)
+            if adj_game_state == minesweeper.GameState.clear:
+                _recursive_open_adjoining_clear(b, adj_row, adj_col)
+
+
+def _time_open(b: minesweeper.board, flood_fill):
+    b._set_display_state(0, 0, minesweeper.DisplayState.opened)
+    start = time.perf_counter()
+    try:
+        flood_fill(b, 0, 0)
+    except RecursionError:
+        return None
+    return time.perf_counter() - start
+
+
+def time_flood_fill(sides=(10, 30, 100, 300, 1000, 1100)):
+    ''' prints the latency of opening a single clear region of side x side cells. Regions of more than
+    minesweeper._MAX_INDEXED_CELLS cells time the walk on a board too large for the adjacency index.
+    '''
+    print("{:>12} {:>12} {:>14} {:>14}".format(
+        "engine", "region", "recursive", "iterative"))
+    for side in sides:
+        for engine in (minesweeper.board, minesweeper.arrayboard):
+            if engine is minesweeper.board and side * side > MAX_CELL_OBJECTS:
+                continue
+            recursive = _time_open(
+                engine(side, side, 0), _recursive_open_adjoining_clear)
+            iterative = _time_open(
+                engine(side, side, 0), engine._open_adjoining_clear)
+            print("{:>12} {:>12} {:>14} {:>14.4f}".format(
+                engine.__name__, side * side,
+                "recursion limit" if recursive is None else "{:.4f}".format(recursive), iterative))
+
+
+def _bench_init(engine, rows: int, columns: int, mines: int, b: minesweeper.board):
+    def op():
+        start = time.perf_counter()
+        engine(rows, columns, mines, seed=1)
+        return 1, time.perf_counter() - start
+    return op
+
+
+def _bench_get_adjoining_mines(engine, rows: int, columns: int, mines: int, b: minesweeper.board):
+    cells = [(i * 7919 % rows, i * 104729 % columns) for i in range(100)]
+
+    def op():
+        start = time.perf_counter()
+        for row, col in cells:
+            b._get_adjoining_mines(row, col)
+        return len(cells), time.perf_counter() - start
+    return op
+
+
+def _bench_open_adjoining_clear(engine, rows: int, columns: int, mines: int, b: minesweeper.board):
+    # opens the region of the first clear cell, and closes it again outside of the timing
+    clear = next(((i, j) for i in range(rows) for j in range(columns)
+                  if b._get_game_state(i, j) == minesweeper.GameState.clear), None)
+
+    def op():
+        if clear is None:
+            return 0, 0.0
+        b._set_display_state(*clear, minesweeper.DisplayState.opened)
+        start = time.perf_counter()
+        opened = b._open_adjoining_clear(*clear)
+        elapsed = time.perf_counter() - start
+        for cell in opened + [clear]:
+            b._set_display_state(*cell, minesweeper.DisplayState.closed)
+        return len(opened) + 1, elapsed
+    return op
+
+
+def _bench_try_move(engine, rows: int, columns: int, mines: int, b: minesweeper.board):
+    # flags and clears cells, which leaves the board as it was
+    cells = [(i * 7919 % rows, i * 104729 % columns) for i in range(1000)]
+
+    def op():
+        start = time.perf_counter()
+        for row, col in cells:
+            b.try_move(row, col, minesweeper.Move.flag)
+            b.try_move(row, col, minesweeper.Move.clear)
+        return 2 * len(cells), time.perf_counter() - start
+    return op
+
+
+def _bench_more_moves_remaining(engine, rows: int, columns: int, mines: int, b: minesweeper.board):
+    def op():
+        start = time.perf_counter()
+        for _ in range(10000):
+            b.more_moves_remaining()
+        return 10000, time.perf_counter() - start
+    return op
+
+
+def _bench_refresh_display(engine, rows: int, columns: int, mines: int, b: minesweeper.board):
+    def op():
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            b.refresh_display()
+        return 1, time.perf_counter() - start
+    return op
+
+
+BENCHMARKS = {
+    "init": _bench_init,
+    "get_adjoining_mines": _bench_get_adjoining_mines,
+    "open_adjoining_clear": _bench_open_adjoining_clear,
+    "try_move": _bench_try_move,
+    "more_moves_remaining": _bench_more_moves_remaining,
+    "refresh_display": _bench_refresh_display,
+}
+
+
+def _run(op, min_time: float):
+    ''' runs the operation until it has been timed for at least min_time seconds, then once more while tracing
+    memory allocations. Returns the operations per second and the peak memory allocated by a run, in bytes.
+    '''
+    ops, elapsed = 0, 0.0
+    while elapsed < min_time:
+        op_ops, op_elapsed = op()
+        ops, elapsed = ops + op_ops, elapsed + op_elapsed
+        if op_ops == 0:
+            break
+    tracemalloc.start()
+    op()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ops / elapsed if elapsed > 0 else 0.0, peak
+
+
+def run_suite(benchmarks=tuple(BENCHMARKS), engines=tuple(ENGINES), sizes=SIZES, densities=DENSITIES,
+              min_time: float = 0.5):
+    ''' runs the benchmarks across engines, board sizes and mine densities, printing a line per result.
+    Returns a dict of results keyed by benchmark/engine/size/density.
+    '''
+    results = {}
+    print("{:<22} {:>12} {:>12} {:>8} {:>16} {:>14}".format(
+        "benchmark", "engine", "size", "density", "ops/sec", "peak KiB"))
+    for rows, columns in sizes:
+        for density in densities:
+            mines = int(rows * columns * density)
+            for name in engines:
+                engine = ENGINES[name]
+                if engine is minesweeper.board and rows * columns > MAX_CELL_OBJECTS:
+                    continue
+                b = engine(rows, columns, mines, seed=1)
+                for benchmark in benchmarks:
+                    ops_per_sec, peak = _run(BENCHMARKS[benchmark](
+                        engine, rows, columns, mines, b), min_time)
+                    key = "{}/{}/{}x{}/{}".format(benchmark,
+                                                  name, rows, columns, density)
+                    results[key] = {"ops_per_sec": ops_per_sec,
+                                    "peak_bytes": peak}
+                    print("{:<22} {:>12} {:>12} {:>8} {:>16.1f} {:>14.1f}".format(
+                        benchmark, name, "{}x{}".format(rows, columns), density, ops_per_sec, peak / 1024))
+                    sys.stdout.flush()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    ''' returns the descriptions of results that regressed against the baseline by more than the threshold:
+    fewer operations per second, or a larger peak memory
+    '''
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        base = baseline[key]
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold):
+            regressions.append("{}: {:.1f} ops/sec, baseline {:.1f}".format(
+                key, result["ops_per_sec"], base["ops_per_sec"]))
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + threshold):
+            regressions.append("{}: {} peak bytes, baseline {}".format(
+                key, result["peak_bytes"], base["peak_bytes"]))
+    return regressions
+
+
+def _size(text: str):
+    rows, columns = text.split("x")
+    return int(rows), int(columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="benchmark board generation, flood fill, moves and rendering")
+    parser.add_argument("--benchmarks", nargs="+",
+                        choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--engines", nargs="+",
+                        choices=sorted(ENGINES), default=list(ENGINES))
+    parser.add_argument("--sizes", nargs="+", type=_size, default=list(SIZES),
+                        help="board sizes as ROWSxCOLUMNS")
+    parser.add_argument("--densities", nargs="+",
+                        type=float, default=list(DENSITIES))
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="minimum seconds to time each benchmark for")
+    parser.add_argument("--save", help="save the results as a JSON baseline")
+    parser.add_argument(
+        "--compare", help="flag regressions against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change counted as a regression")
+    parser.add_argument("--compare-engines", action="store_true",
+                        help="only compare memory and moves of the storage engines")
+    parser.add_argument("--compare-flood-fill", action="store_true",
+                        help="only compare the flood fill with the old recursive one")
+    args = parser.parse_args()
+
+    if args.compare_engines:
+        compare_engines()
+        return
+    if args.compare_flood_fill:
+        time_flood_fill()
+        return
+
+    results = run_suite(args.benchmarks, args.engines,
+                        args.sizes, args.densities, args.min_time)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print("regression: " + regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+import bisect
+import collections
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+
+from minesweeper import InvalidInputError, Move, MoveResult, board
+
+# upper bounds of the histogram buckets, in seconds for timings and in cells for sizes
+_SECONDS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, 10.0)
+_CELLS = (1, 2, 4, 8, 16, 64, 256, 1024, 4096, 16384, 65536)
+
+_HISTOGRAMS = {
+    "check_seconds": (_SECONDS, "time spent checking the cell and the move"),
+    "apply_seconds": (_SECONDS, "time spent applying the move"),
+    "render_seconds": (_SECONDS, "time spent drawing the board after a move"),
+    "flood_size": (_CELLS, "cells opened by the flood fill of a move that opened a clear cell"),
+    "flood_depth": (_CELLS, "steps between adjoining cells from the opened cell to the farthest cell of its flood fill"),
+    "cells_touched": (_CELLS, "cells whose display state a move changed"),
+}
+
+
+class _histogram(object):
+    ''' counts observed values into buckets with fixed upper bounds, plus an overflow bucket '''
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        return {"bounds": list(self.bounds), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+
+class instruments(object):
+    ''' instruments record what every move costs on the boards, and games, they are attached to: the time spent
+    checking and applying the move, the size and depth of its flood fill, the time spent drawing the board after it,
+    and the number of cells it touched. They are kept as counters and histograms, and the last moves are kept as
+    they are, to find out why a move was slow.
+    Boards without instruments only pay for checking that they have none. With profile_every set, every Nth move
+    is also run under cProfile, and the profiles are accumulated.
+    '''
+
+    def __init__(self, recent: int = 100, profile_every: int = 0):
+        self._lock = threading.Lock()
+        self._moves = collections.Counter()  # (move, result) -> number of moves
+        self._histograms = {name: _histogram(bounds) for name, (bounds, _) in _HISTOGRAMS.items()}
+        self._recent = collections.deque(maxlen=recent)
+        self._profile_every = profile_every
+        self._profile = None
+        self._count = 0
+
+    def attach(self, target):
+        ''' attaches the instruments to a board, or to the board of a game. Returns the target '''
+        b = target if isinstance(target, board) else target.board
+        b._instruments = self
+        return target
+
+    def apply(self, b: board, row: int, col: int, move: Move):
+        ''' applies a move to a board for board.try_move, measuring it '''
+        start = time.perf_counter()
+        try:
+            b._check_cell(row, col)
+            b._check_move(row, col, move)
+        except InvalidInputError:
+            pass  # _apply finds the move invalid too, and try_move raises the error
+        checked = time.perf_counter()
+
+        self._count += 1
+        profiler = None
+        if self._profile_every and self._count % self._profile_every == 0:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        result, changed = b._apply(row, col, move)
+        applied = time.perf_counter()
+        if profiler is not None:
+            profiler.disable()
+
+        flood_size = flood_depth = None
+        if move == Move.open and result == MoveResult.ok and len(changed) > 1:
+            flood_size = len(changed) - 1
+            flood_depth = _depth(b, changed)
+        record = {
+            "row": row,
+            "col": col,
+            "move": move.name,
+            "result": result.name,
+            "check_seconds": checked - start,
+            "apply_seconds": applied - checked,
+            "flood_size": flood_size,
+            "flood_depth": flood_depth,
+            "cells_touched": len(changed),
+            "render_seconds": None,
+        }
+        with self._lock:
+            self._moves[(move.name, result.name)] += 1
+            for name in ("check_seconds", "apply_seconds", "flood_size", "flood_depth", "cells_touched"):
+                if record[name] is not None:
+                    self._histograms[name].observe(record[name])
+            self._recent.append(record)
+            if profiler is not None:
+                if self._profile is None:
+                    self._profile = pstats.Stats(profiler)
+                else:
+                    self._profile.add(profiler)
+        return result, changed
+
+    def render(self, draw, *args):
+        ''' draws the board for game._show, measuring the time it takes as the render time of the last move '''
+        start = time.perf_counter()
+        draw(*args)
+        seconds = time.perf_counter() - start
+        with self._lock:
+            self._histograms["render_seconds"].observe(seconds)
+            if self._recent and self._recent[-1]["render_seconds"] is None:
+                self._recent[-1]["render_seconds"] = seconds
+
+    def recent(self):
+        ''' returns the records of the last moves, oldest first '''
+        with self._lock:
+            return [dict(record) for record in self._recent]
+
+    def profile(self):
+        ''' returns the pstats.Stats accumulated from the sampled moves, or None if no move was sampled yet '''
+        return self._profile
+
+    def snapshot(self):
+        ''' returns the counters and histograms as a dict '''
+        with self._lock:
+            return {
+                "moves": [{"move": move, "result": result, "count": count}
+                          for (move, result), count in sorted(self._moves.items())],
+                "histograms": {name: histogram.snapshot() for name, histogram in self._histograms.items()},
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def to_prometheus(self, prefix: str = "minesweeper"):
+        ''' returns the counters and histograms in the Prometheus text exposition format '''
+        snapshot = self.snapshot()
+        lines = ["# HELP {}_moves_total moves played, by move and result".format(prefix),
+                 "# TYPE {}_moves_total counter".format(prefix)]
+        for moves in snapshot["moves"]:
+            lines.append('{}_moves_total{{move="{move}",result="{result}"}} {count}'.format(prefix, **moves))
+        for name, histogram in snapshot["histograms"].items():
+            metric = "{}_move_{}".format(prefix, name)
+            lines.append("# HELP {} {}".format(metric, _HISTOGRAMS[name][1]))
+            lines.append("# TYPE {} histogram".format(metric))
+            cumulative = 0
+            for bound, count in zip(histogram["bounds"] + ["+Inf"], histogram["counts"]):
+                cumulative += count
+                lines.append('{}_bucket{{le="{}"}} {}'.format(metric, bound, cumulative))
+            lines.append("{}_sum {}".format(metric, histogram["sum"]))
+            lines.append("{}_count {}".format(metric, histogram["count"]))
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str, prometheus: bool = False):
+        ''' writes a snapshot to a file, as JSON or in the Prometheus text format. The file is replaced at once, so
+        readers never see a partial snapshot.
+        '''
+        with open(path + ".tmp", "w") as f:
+            f.write(self.to_prometheus() if prometheus else self.to_json())
+        os.replace(path + ".tmp", path)
+
+    def export_every(self, path: str, seconds: float, prometheus: bool = False):
+        ''' exports a snapshot to a file every so many seconds from a background thread, until the returned event
+        is set
+        '''
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(seconds):
+                self.export(path, prometheus)
+        threading.Thread(target=run, daemon=True).start()
+        return stop
+
+
+def _depth(b: board, changed: list):
+    ''' returns the number of steps between adjoining cells from the opened cell, first in changed, to the farthest
+    cell opened with it
+    '''
+    region = set(changed)
+    seen = {changed[0]}
+    layer = [changed[0]]
+    depth = -1
+    while layer:
+        depth += 1
+        next_layer = []
+        for current in layer:
+            for cell in b._adjoining(*current):
+                if cell in region and cell not in seen:
+                    seen.add(cell)
+                    next_layer.append(cell)
+        layer = next_layer
+    return depth
@@ -0,0 +1,193 @@
+import os
+import random
+import struct
+
+from minesweeper import GameStatus, InvalidInputError, Move, arrayboard, board, chunkedboard, lazyboard
+
+# journal layout: fixed-width slots, a slot per move and two per game start, the second one holding the number of
+# mines and the seed the board was generated from
+_SLOT = struct.Struct("<IBBxxii")  # game, move or _START, move result or engine, row or rows, col or columns
+_START_DATA = struct.Struct("<QQ")  # mines, seed
+_START = 0xFF
+# index layout: an entry for the start of every game and for every stride-th move of a game
+_INDEX = struct.Struct("<IIQ")  # game, move number, slot
+# board classes that can be replayed from a seed, by the engine number stored in the start of a game
+ENGINES = (board, arrayboard, lazyboard, chunkedboard)
+
+
+class journal(object):
+    ''' journal is an append-only file of every move played on the boards it starts, and its outcome, so every game
+    can be replayed from its seed. Moves are buffered and written with an fsync once every batch moves, and on close.
+    A small index, in a file next to the journal, locates the start of every game and every stride-th move of a game.
+    '''
+
+    def __init__(self, path: str, batch: int = 256, stride: int = 64):
+        self._path = path
+        self._batch = batch
+        self._stride = stride
+        self._slots = os.path.getsize(path) // _SLOT.size if os.path.exists(path) else 0
+        self._next_game = 1 + max((_INDEX.unpack(entry)[0] for entry in _read(path + ".idx", _INDEX.size)),
+                                  default=0)
+        self._file = open(path, "ab")
+        self._index = open(path + ".idx", "ab")
+        self._buffer = bytearray()
+        self._index_buffer = bytearray()
+        self._pending = 0
+        self._moves = {}  # game in progress -> number of moves recorded
+
+    def new_game(self, rows: int, columns: int, mines: int, seed: int = None, engine=lazyboard):
+        ''' returns a new board of the engine, whose moves are recorded to the journal. The seed must be an integer
+        of up to 64 bits; a random one is drawn if it is not specified.
+        '''
+        if seed is None:
+            seed = random.getrandbits(64)
+        b = engine(rows, columns, mines, seed)
+        game = self._next_game
+        self._next_game += 1
+        b._journal, b._game = self, game
+        self._moves[game] = 0
+        self._append(_SLOT.pack(game, _START, ENGINES.index(engine), rows, columns) +
+                     _START_DATA.pack(mines, seed), game, 0)
+        return b
+
+    def record(self, b: board, row: int, col: int, move: Move, result):
+        ''' records a move played on a board of the journal, and its MoveResult '''
+        game = b._game
+        number = self._moves.get(game)
+        if number is not None:
+            number += 1
+            if b.status() == GameStatus.in_progress:
+                self._moves[game] = number
+            else:
+                del self._moves[game]
+        self._append(_SLOT.pack(game, move.value, result.value, row, col), game, number)
+
+    def _append(self, data: bytes, game: int, number: int):
+        if number is not None and number % self._stride == 0:
+            self._index_buffer += _INDEX.pack(game, number, self._slots)
+        self._buffer += data
+        self._slots += len(data) // _SLOT.size
+        self._pending += 1
+        if self._pending >= self._batch:
+            self.flush()
+
+    def flush(self):
+        ''' writes the buffered moves and index entries, and waits for them to reach the disk '''
+        for f, buffer in ((self._file, self._buffer), (self._index, self._index_buffer)):
+            f.write(buffer)
+            f.flush()
+            os.fsync(f.fileno())
+        self._buffer = bytearray()
+        self._index_buffer = bytearray()
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read(path: str, size: int, start: int = 0, chunk: int = 4096):
+    ''' yields the fixed-width records of a file from the start-th one, reading chunk records at a time.
+    A record torn by an interrupted write at the end of the file is skipped.
+    '''
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        f.seek(start * size)
+        while True:
+            data = f.read(size * chunk)
+            for offset in range(0, len(data) - size + 1, size):
+                yield data[offset:offset + size]
+            if len(data) < size * chunk:
+                return
+
+
+def records(path: str, start: int = 0):
+    ''' yields the records of a journal from the start-th slot, as (slot, game, move, result, row, col) tuples.
+    The start of a game is yielded as (slot, game, None, engine, rows, columns, mines, seed).
+    '''
+    slots = _read(path, _SLOT.size, start)
+    slot = start
+    for data in slots:
+        game, kind, value, row, col = _SLOT.unpack(data)
+        if kind != _START:
+            yield slot, game, Move(kind), value, row, col
+            slot += 1
+            continue
+        data = next(slots, None)
+        if data is None:
+            return
+        yield (slot, game, None, ENGINES[value], row, col) + _START_DATA.unpack(data)
+        slot += 2
+
+
+def _play(b: board, record: tuple):
+    ''' replays a move record on a board, checking that it has the recorded outcome '''
+    slot, game, move, result, row, col = record
+    if b._apply(row, col, move)[0].value != result:
+        raise InvalidInputError("journal does not match the replay of game {} at slot {}".format(game, slot))
+
+
+def replay(path: str, games=None):
+    ''' replays the games of a journal, or only the specified ones, and yields every game as (game, board) once it
+    ends, then the games still in progress at the end of the journal
+    '''
+    boards = {}
+    for record in records(path):
+        game = record[1]
+        if games is not None and game not in games:
+            continue
+        if record[2] is None:
+            _, _, _, engine, rows, columns, mines, seed = record
+            boards[game] = engine(rows, columns, mines, seed)
+            continue
+        b = boards.get(game)
+        if b is None:
+            continue  # moves played on a game that already ended
+        _play(b, record)
+        if b.status() != GameStatus.in_progress:
+            yield game, boards.pop(game)
+    yield from boards.items()
+
+
+def seek(path: str, game: int, move: int):
+    ''' returns the slot of the specified move of a game, 0 being the start of the game, using the index to skip to the
+    closest indexed move before it
+    '''
+    slot, number = None, 0
+    for entry in _read(path + ".idx", _INDEX.size):
+        entry_game, entry_number, entry_slot = _INDEX.unpack(entry)
+        if entry_game == game and number <= entry_number <= move:
+            slot, number = entry_slot, entry_number
+    if slot is None:
+        raise InvalidInputError("no game {} in journal {}".format(game, path))
+    for record in records(path, slot):
+        if record[1] != game:
+            continue
+        if number == move:
+            return record[0]
+        number += 1
+    raise InvalidInputError("game {} has fewer than {} moves".format(game, move))
+
+
+def rebuild(path: str, game: int, move: int):
+    ''' returns the board of a game as it was after the specified number of moves '''
+    for record in records(path, seek(path, game, 0)):
+        if record[1] != game:
+            continue
+        if record[2] is None:
+            _, _, _, engine, rows, columns, mines, seed = record
+            b = engine(rows, columns, mines, seed)
+        else:
+            _play(b, record)
+            move -= 1
+        if move == 0:
+            return b
+    raise InvalidInputError("game {} has fewer moves than asked".format(game))
@@ -1,4 +1,13 @@
+import collections
+import functools
+import mmap
+import os
 import random
+import struct
+import sys
+import tempfile
+import unicodedata
+from array import array
 from enum import Enum
 
 
@@ -32,6 +41,274 @@ class DisplayState(Enum):
     opened = 2
 
 
+class GameStatus(Enum):
+    ''' possible game statuses '''
+    in_progress = 0
+    won = 1
+    lost = 2
+
+
+class Topology(Enum):
+    ''' possible arrangements of the cells adjoining a cell '''
+    square = 0  # the 8 cells around the cell
+    cross = 1  # the 4 cells sharing a side with the cell
+    torus = 2  # the 8 cells around the cell, wrapping around the edges of the board
+    hex = 3  # the 6 cells around a hexagonal cell, odd rows being shifted right by half a cell
+
+
+class MoveResult(Enum):
+    ''' possible outcomes of a move applied without raising exceptions '''
+    ok = 0
+    invalid_cell = 1
+    invalid_move = 2
+    no_flags = 3
+    mine = 4
+    game_over = 5
+
+
+# moves that are not allowed for a cell in each display state
+_INVALID_MOVES = {
+    DisplayState.closed: (Move.clear,),
+    DisplayState.flagged: (Move.open, Move.flag),
+    DisplayState.opened: (Move.clear, Move.open, Move.flag),
+}
+
+# lookup tables to map stored game state values (offset by 1) and display state values back to the states
+_GAME_STATES = (GameState.mined, GameState.clear) + tuple(range(1, 9))
+_DISPLAY_STATES = tuple(DisplayState)
+
+
+# board size and mines of the game difficulty presets, and the names a difficulty can be entered as
+PRESETS = {
+    "easy": (8, 10, 10),
+    "medium": (14, 18, 40),
+    "difficult": (20, 24, 100),
+}
+_DIFFICULTIES = {
+    "easy": ["Easy", "easy", "E", "e"],
+    "medium": ["Medium", "medium", "M", "m"],
+    "difficult": ["Difficult", "difficult", "D", "d"],
+}
+
+
+def _preset(difficulty: str):
+    ''' returns the name of the preset for a difficulty as entered. Throws an InvalidInputError exception for an
+    unknown difficulty.
+    '''
+    for name, aliases in _DIFFICULTIES.items():
+        if difficulty in aliases:
+            return name
+    raise InvalidInputError("Invalid input: " + difficulty)
+
+
+# positions of the adjoining cells relative to a cell, per topology; hexagonal cells of even and odd rows differ
+_DIRECTIONS = {
+    Topology.square: ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)),
+    Topology.cross: ((-1, 0), (0, -1), (0, 1), (1, 0)),
+    Topology.torus: ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)),
+}
+_HEX_DIRECTIONS = (((-1, -1), (-1, 0), (0, -1), (0, 1), (1, -1), (1, 0)),
+                   ((-1, 0), (-1, 1), (0, -1), (0, 1), (1, 0), (1, 1)))
+# boards with more cells than this are not indexed, their adjoining cells are computed when needed instead
+_MAX_INDEXED_CELLS = 1 << 20
+
+
+def _neighbors(topology: Topology, rows: int, columns: int, row: int, col: int):
+    ''' returns the row major positions of the cells adjoining a cell, computed from its position '''
+    directions = _HEX_DIRECTIONS[row & 1] if topology == Topology.hex else _DIRECTIONS[topology]
+    k = row * columns + col
+    neighbors = []
+    for row_step, col_step in directions:
+        i, j = row + row_step, col + col_step
+        if topology == Topology.torus:
+            i, j = i % rows, j % columns
+        elif i < 0 or i >= rows or j < 0 or j >= columns:
+            continue
+        # cells can wrap around to themselves, or to the same cell twice, on a very small torus
+        adjoining = i * columns + j
+        if adjoining != k and adjoining not in neighbors:
+            neighbors.append(adjoining)
+    return neighbors
+
+
+@functools.lru_cache(maxsize=16)
+def _adjacency(rows: int, columns: int, topology: Topology):
+    ''' returns the CSR adjacency index of a board shape: each cell's offset into the positions adjoining all cells '''
+    def row_adjacency(row: int):
+        ends, positions = [], []
+        for col in range(columns):
+            positions += _neighbors(topology, rows, columns, row, col)
+            ends.append(len(positions))
+        return ends, positions
+
+    offsets = array('I', [0])
+    neighbors = array('I')
+    templates = {}
+    for row in range(rows):
+        # rows away from the top and bottom edges are the first such row of the same parity, shifted
+        template = 2 - (row & 1)
+        if 0 < row < rows - 1 and template < rows - 1:
+            if template not in templates:
+                templates[template] = row_adjacency(template)
+            ends, positions = templates[template]
+            shift = (row - template) * columns
+            positions = [k + shift for k in positions]
+        else:
+            ends, positions = row_adjacency(row)
+        start = len(neighbors)
+        offsets.extend([start + end for end in ends])
+        neighbors.extend(positions)
+    return offsets, neighbors
+
+
+def _unindexed_function(rows: int, columns: int, topology: Topology):
+    ''' returns the function from a cell position to its adjoining positions for a board too large to index '''
+    # cells away from the edges adjoin the cells at the same offsets as every such cell of their row parity
+    directions = _HEX_DIRECTIONS if topology == Topology.hex else (_DIRECTIONS[topology],) * 2
+    even, odd = (tuple(i * columns + j for i, j in steps) for steps in directions)
+    last_row, last_col = rows - 1, columns - 1
+
+    if topology in (Topology.square, Topology.torus):
+        # the 8 cells around a cell, spelled out since it is the most common case
+        def adjoining(k: int):
+            row, col = divmod(k, columns)
+            if 0 < row < last_row and 0 < col < last_col:
+                up, down = k - columns, k + columns
+                return (up - 1, up, up + 1, k - 1, k + 1, down - 1, down, down + 1)
+            return _neighbors(topology, rows, columns, row, col)
+        return adjoining
+
+    def adjoining(k: int):
+        row, col = divmod(k, columns)
+        if 0 < row < last_row and 0 < col < last_col:
+            return [k + step for step in (odd if row & 1 else even)]
+        return _neighbors(topology, rows, columns, row, col)
+    return adjoining
+
+
+def _adjoining_function(rows: int, columns: int, topology: Topology):
+    ''' returns a function from the row major position of a cell to the positions of its adjoining cells, read from
+    the adjacency index of the shape, or computed for a board too large to index
+    '''
+    if rows * columns > _MAX_INDEXED_CELLS:
+        return _unindexed_function(rows, columns, topology)
+    offsets, neighbors = _adjacency(rows, columns, topology)
+    return lambda k: neighbors[offsets[k]:offsets[k + 1]]
+
+
+def _rng(seed):
+    ''' returns the random generator for a seed: the seed itself if it is a random.Random instance, a new generator
+    seeded with it otherwise, or the global generator of the random module if there is no seed
+    '''
+    if seed is None:
+        return random
+    if isinstance(seed, random.Random):
+        return seed
+    return random.Random(seed)
+
+
+def _mix(x: int):
+    ''' returns a 64-bit integer mixed from x with the SplitMix64 finalizer, so nearby inputs give unrelated
+    outputs, the same in every process
+    '''
+    x = (x + 1) * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF
+    x = (x ^ x >> 30) * 0xBF58476D1CE4E5B9 & 0xFFFFFFFFFFFFFFFF
+    x = (x ^ x >> 27) * 0x94D049BB133111EB & 0xFFFFFFFFFFFFFFFF
+    return x ^ x >> 31
+
+
+def _zobrist(k: int, visible: int):
+    ''' returns the Zobrist key of the cell at a row major position showing a visible state; closed cells, shown
+    as 0, have no key so that a new board hashes to 0 whatever its size
+    '''
+    return _mix(k << 4 | visible) if visible else 0
+
+
+def _place_mines(rows: int, columns: int, mines: int, rng=random, safe=()):
+    ''' picks the mined cells, none of them among the safe cells. Every position is sampled at most once, so there
+    is no rejection loop; positions are sampled among the cells that are not safe, then shifted past the safe ones.
+    '''
+    if not safe:
+        return [divmod(k, columns) for k in rng.sample(range(rows * columns), mines)]
+    skipped = sorted(row * columns + col for row, col in safe)
+    mine_cells = []
+    for k in rng.sample(range(rows * columns - len(skipped)), mines):
+        for position in skipped:
+            if k >= position:
+                k += 1
+        mine_cells.append(divmod(k, columns))
+    return mine_cells
+
+
+def _game_state_grid(rows: int, columns: int, mine_cells: list, topology: Topology = Topology.square):
+    ''' returns the game state of all cells in row major order as signed bytes: -1 mined, or the adjoining mines '''
+    if topology != Topology.square:
+        adjoining = _adjoining_function(rows, columns, topology)
+        states = bytearray(rows * columns)
+        for row, col in mine_cells:
+            for k in adjoining(row * columns + col):
+                states[k] += 1
+        for row, col in mine_cells:
+            states[row * columns + col] = 0xFF
+        return states
+
+    # a 3x3 neighbor sum over the mine grid padded by a cell, held in one integer with a byte per cell so each
+    # shifted copy is summed in one operation; a count never exceeds 8, so the bytes never carry into each other
+    stride = columns + 2
+    padded = bytearray(stride * (rows + 2))
+    for row, col in mine_cells:
+        padded[(row + 1) * stride + col + 1] = 1
+    grid = int.from_bytes(padded, "little")
+    counts = 0
+    for offset in (1, stride - 1, stride, stride + 1):
+        counts += (grid << 8 * offset) + (grid >> 8 * offset)
+    counts &= (1 << 8 * len(padded)) - 1
+    padded = counts.to_bytes(len(padded), "little")
+
+    states = bytearray(rows * columns)
+    for row in range(rows):
+        start = (row + 1) * stride + 1
+        states[row * columns:(row + 1) * columns] = padded[start:start + columns]
+    for row, col in mine_cells:
+        states[row * columns + col] = 0xFF  # -1 as a signed byte
+    return states
+
+
+# board file layout: header, mine bitmap at 1 bit per cell, display states at 2 bits per cell
+_MAGIC = b"MSWP"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBB2xIIIIIIB3x")  # the byte after the version is the topology
+# maps a stored game state value to 1 for a mined cell (-1 is stored as 0xFF) and 0 otherwise
+_MINED_BYTES = bytes(256 - 1) + b"\x01"
+# the same for a lazyboard game state, where a mined cell is stored as 1
+_LAZY_MINED_BYTES = b"\x00\x01" + bytes(256 - 2)
+
+
+def _pack(values: bytes, bits: int):
+    ''' packs values, one per byte, into consecutive fields of the specified bit width '''
+    per_byte = 8 // bits
+    size = -(-len(values) // per_byte)
+    # each field of the packed bytes is a strided slice, shifted into place in one integer
+    packed = 0
+    for field in range(per_byte):
+        lane = values[field::per_byte]
+        packed |= int.from_bytes(lane + bytes(size - len(lane)), "little") << bits * field
+    return packed.to_bytes(size, "little")
+
+
+def _unpack(packed: bytes, bits: int, count: int):
+    ''' unpacks count values of the specified bit width into a bytearray with a value per byte '''
+    per_byte = 8 // bits
+    size = len(packed)
+    mask = int.from_bytes(bytes([(1 << bits) - 1]) * size, "little")
+    packed = int.from_bytes(packed, "little")
+    values = bytearray(size * per_byte)
+    for field in range(per_byte):
+        values[field::per_byte] = (packed >> bits * field & mask).to_bytes(size, "little")
+    del values[count:]
+    return values
+
+
 class cell(object):
     ''' cell represents a position on the board.
     It has following game states:
@@ -49,62 +326,133 @@ class cell(object):
         self._display_state = DisplayState.closed
 
     def __str__(self):
-        if self._display_state == DisplayState.closed:
-            return "\u25C9"  # fish eye
-        if self._display_state == DisplayState.flagged:
-            return "\u26F3"  # flag
-        if self._display_state == DisplayState.opened:
-            if self._game_state == GameState.mined:
-                return "\u2620"  # skull
-            if self._game_state == GameState.clear:
-                return "\u25EF"  # large circle
-            return str(self._game_state)
+        return _symbol(self._game_state, self._display_state)
+
+
+def _symbol(game_state, display_state: DisplayState):
+    ''' returns the symbol used to display a cell with the specified game and display states '''
+    if display_state == DisplayState.closed:
+        return "\u25C9"  # fish eye
+    if display_state == DisplayState.flagged:
+        return "\u26F3"  # flag
+    if display_state == DisplayState.opened:
+        if game_state == GameState.mined:
+            return "\u2620"  # skull
+        if game_state == GameState.clear:
+            return "\u25EF"  # large circle
+        return str(game_state)
 
 
 class board(object):
     ''' board contains cells and represents current state of the game. '''
 
-    def __init__(self, rows: int, columns: int, mines: int):
-        ''' initialize the board with specified rows, columns and mines'''
-        self._mines = mines
+    _journal = None  # the journal that moves are recorded to, if any
+    _instruments = None  # the instruments that time and measure moves, if any
+    _log = None  # the change log of the moves applied, kept from the first snapshot on
+    _hash = None  # the Zobrist hash of the visible state, kept once it is asked for
+    _frontier = None  # closed cell -> opened numbered cells adjoining it, kept once it is asked for
+    _topology = Topology.square
+
+    def __init__(self, rows: int, columns: int, mines: int, seed=None, topology: Topology = Topology.square):
+        ''' initialize the board with specified rows, columns and mines. The mines are placed using the seed, which
+        is either an int or a random.Random instance, so the same seed always gives the same board.
+        The topology decides which cells adjoin a cell.
+        '''
+        self._init_counters(rows, columns, mines, topology)
+
+        # pick randoms mine cells
+        self._mine_cells = _place_mines(rows, columns, mines, _rng(seed))
+
+        # initialize the board with the mines and the number of adjoining mines of every cell
+        self._init_cells(_game_state_grid(rows, columns, self._mine_cells, topology))
+
+    @classmethod
+    def from_mines(cls, rows: int, columns: int, mine_cells: list, topology: Topology = Topology.square):
+        ''' returns a board with the mines on the specified cells, instead of placed at random '''
+        b = cls.__new__(cls)
+        b._init_counters(rows, columns, len(mine_cells), topology)
+        b._mine_cells = list(mine_cells)
+        b._init_cells(_game_state_grid(rows, columns, b._mine_cells, topology))
+        return b
+
+    def _init_counters(self, rows: int, columns: int, mines: int, topology: Topology = Topology.square):
+        ''' sets the size, mines and topology of a board with all cells closed, and the running counters that decide
+        the game status without scanning the board
+        '''
         self._rows = rows
         self._columns = columns
+        self._mines = mines
         self._flags = mines
+        self._topology = topology
+        self._closed = rows * columns
+        self._flagged_mines = 0
+        self._lost = False
 
-        # pick randoms mine cells
-        self._mine_cells = []
-        while len(self._mine_cells) < mines:
-            i, j = random.randint(0, rows-1), random.randint(0, columns-1)
-            if (i, j) not in self._mine_cells:
-                self._mine_cells.append((i, j))
-
-        # initialize the board
-        self.cells = [[cell(game_state=GameState.clear)
-                       for j in range(columns)] for i in range(rows)]
-
-        # place the mines
-        for (row, col) in self._mine_cells:
-            self.cells[row][col]._game_state = GameState.mined
-
-        # setup rest of the cells
-        for row in range(self._rows):
-            for col in range(self._columns):
-                if self.cells[row][col]._game_state == GameState.clear:
-                    # check if the cell has adjoining mines and set a number, if any
-                    mine_count = self._get_adjoining_mines(row, col)
-                    if mine_count > 0:
-                        self.cells[row][col]._game_state = mine_count
+    def _all_cells(self):
+        ''' returns all cells in row major order '''
+        return [(i, j) for i in range(self._rows) for j in range(self._columns)]
+
+    def _init_cells(self, game_states: bytearray):
+        ''' allocates the storage for cells from the game state grid. All cells start closed '''
+        states = array('b', game_states)
+        columns = self._columns
+        self.cells = [[cell(game_state=_GAME_STATES[states[i * columns + j] + 1])
+                       for j in range(columns)] for i in range(self._rows)]
+
+    def _get_game_state(self, row: int, col: int):
+        ''' returns the game state of the cell '''
+        return self.cells[row][col]._game_state
+
+    def _set_game_state(self, row: int, col: int, game_state):
+        ''' sets the game state of the cell '''
+        self.cells[row][col]._game_state = game_state
+
+    def _get_display_state(self, row: int, col: int):
+        ''' returns the display state of the cell '''
+        return self.cells[row][col]._display_state
+
+    def _set_display_state(self, row: int, col: int, display_state: DisplayState):
+        ''' sets the display state of the cell '''
+        self.cells[row][col]._display_state = display_state
+
+    def _cell_str(self, row: int, col: int):
+        ''' returns the symbol used to display the cell '''
+        return _symbol(self._get_game_state(row, col), self._get_display_state(row, col))
+
+    def _state_bytes(self):
+        ''' returns two bytes objects with a byte per cell in row major order: 1 for a mined cell and 0 otherwise,
+        and the display state value of the cell
+        '''
+        cells = self._all_cells()
+        mined = bytes(self._get_game_state(*cell) == GameState.mined for cell in cells)
+        return mined, bytes(self._get_display_state(*cell).value for cell in cells)
+
+    def save(self, path: str):
+        ''' saves the board to a file: a header with the size and counters of the board, followed by the mine
+        bitmap bit-packed, and the display states packed at 2 bits per cell
+        '''
+        mined, display_states = self._state_bytes()
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self._topology.value, self._rows, self._columns, self._mines,
+                                 self._flags, self._closed, self._flagged_mines, self._lost))
+            f.write(_pack(mined, 1))
+            f.write(_pack(display_states, 2))
+
+    def _adjoining_positions(self, k: int):
+        ''' returns the row major positions of the cells adjoining the cell at a row major position '''
+        adjoining = self.__dict__.get("_adjoining_of")
+        if adjoining is None:
+            adjoining = self._adjoining_of = _adjoining_function(self._rows, self._columns, self._topology)
+        return adjoining(k)
+
+    def _adjoining(self, row: int, col: int):
+        ''' returns the cells adjoining the cell '''
+        columns = self._columns
+        return [divmod(k, columns) for k in self._adjoining_positions(row * columns + col)]
 
     def _get_adjoining_mines(self, row: int, col: int):
         ''' return the number of mines adjoining the cell '''
-        adjoining_cells = [
-            (row-1, col-1), (row-1, col), (row-1, col+1),
-            (row, col-1), (row, col+1),
-            (row+1, col-1), (row+1, col), (row+1, col+1),
-        ]
-        adjoining_mines = list(
-            filter(lambda x: x in self._mine_cells, adjoining_cells))
-        return len(adjoining_mines)
+        return sum(self._get_game_state(i, j) == GameState.mined for i, j in self._adjoining(row, col))
 
     def rows(self):
         return self._rows
@@ -137,13 +485,8 @@ class board(object):
           - clearing a cell that is not flagged
           - flagging a closed cell after all flags have been exhausted
         '''
-        display_state = self.cells[row][col]._display_state
-        invalid_moves = {
-            DisplayState.closed: [Move.clear],
-            DisplayState.flagged: [Move.open, Move.flag],
-            DisplayState.opened: [Move.clear, Move.open, Move.flag],
-        }
-        if move in invalid_moves[display_state]:
+        display_state = self._get_display_state(row, col)
+        if move in _INVALID_MOVES[display_state]:
             raise InvalidInputError(
                 move.name + " is not allowed for a cell that is " + display_state.name)
 
@@ -156,51 +499,314 @@ class board(object):
         - opening a closed cell
         - opening a mined cell (this results in OpenedMine exception and game ends)
         '''
-        self._check_cell(row, col)
-        self._check_move(row, col, move)
-        cell = self.cells[row][col]
+        if self._instruments is None:
+            result, self._last_changed = self._apply(row, col, move)
+        else:
+            result, self._last_changed = self._instruments.apply(self, row, col, move)
+        if self._journal is not None:
+            self._journal.record(self, row, col, move, result)
+        if result == MoveResult.invalid_cell:
+            self._check_cell(row, col)
+        if result == MoveResult.invalid_move:
+            self._check_move(row, col, move)
+        if result == MoveResult.no_flags:
+            raise InvalidInputError("you have already consumed all the flags!")
+        if result == MoveResult.mine:
+            raise OpenedMine("Opened a mine, you lost!")
+
+    def _apply(self, row: int, col: int, move: Move):
+        ''' applies the specified move on the specified cell without raising exceptions.
+        Returns the MoveResult of the move, and the list of cells whose display state changed.
+        '''
+        if row < 0 or row >= self._rows or col < 0 or col >= self._columns:
+            return MoveResult.invalid_cell, []
+        if move in _INVALID_MOVES[self._get_display_state(row, col)]:
+            return MoveResult.invalid_move, []
+
         if move == Move.open:
-            # _check_move ensure that only display state possible here is DisplayState.closed
-            if cell._game_state != GameState.mined:
-                cell._display_state = DisplayState.opened
-                if cell._game_state == GameState.clear:
-                    self._open_adjoining_clear(row, col)
-            if cell._game_state == GameState.mined:
-                # set the state of cells to open and raise the exception to end the game
-                for i in range(self._rows):
-                    for j in range(self._columns):
-                        self.cells[i][j]._display_state = DisplayState.opened
-                raise OpenedMine("Opened a mine, you lost!")
+            # only display state possible here is DisplayState.closed
+            game_state = self._get_game_state(row, col)
+            if game_state == GameState.mined:
+                self._log_change(None, None)
+                self._closed = 0
+                self._lost = True
+                revealed = self._reveal()
+                self._hash_change(None, None)
+                self._frontier_change(None)
+                return MoveResult.mine, revealed
+            self._set_display_state(row, col, DisplayState.opened)
+            changed = [(row, col)]
+            if game_state == GameState.clear:
+                changed += self._open_adjoining_clear(row, col)
+            self._log_change(changed, DisplayState.closed)
+            self._closed -= len(changed)
+            self._hash_change(changed, DisplayState.closed)
+            self._frontier_change(changed)
+            return MoveResult.ok, changed
 
         if move == Move.flag:
-            # _check_move ensures that only display state possible here is DisplayState.closed
+            # only display state possible here is DisplayState.closed
             if self._flags <= 0:
-                raise InvalidInputError(
-                    "you have already consumed all the flags!")
+                return MoveResult.no_flags, []
+            self._log_change([(row, col)], DisplayState.closed)
             self._flags -= 1
-            cell._display_state = DisplayState.flagged
+            self._closed -= 1
+            if self._get_game_state(row, col) == GameState.mined:
+                self._flagged_mines += 1
+            self._set_display_state(row, col, DisplayState.flagged)
+            self._hash_change([(row, col)], DisplayState.closed)
+            self._frontier_change([(row, col)])
+            return MoveResult.ok, [(row, col)]
+
+        # only move and display state possible here are Move.clear and DisplayState.flagged
+        self._log_change([(row, col)], DisplayState.flagged)
+        self._flags += 1
+        self._closed += 1
+        if self._get_game_state(row, col) == GameState.mined:
+            self._flagged_mines -= 1
+        self._set_display_state(row, col, DisplayState.closed)
+        self._hash_change([(row, col)], DisplayState.flagged)
+        self._frontier_change([(row, col)])
+        return MoveResult.ok, [(row, col)]
+
+    def _log_change(self, changed: list, display_state: DisplayState):
+        ''' logs the counters and the cells a move is about to change, with the display state they all had '''
+        if self._log is None:
+            return
+        if changed is None:
+            # a move revealing the board logs a copy of the display states of all cells
+            changed, display_state = self._display_copy(), None
+        self._log.append((self._closed, self._flags, self._flagged_mines, self._lost, changed, display_state))
+
+    def _display_copy(self):
+        ''' returns a copy of the display states of all cells '''
+        return [self._get_display_state(*cell) for cell in self._all_cells()]
+
+    def _restore_display(self, display_states):
+        ''' restores the display states of all cells from a copy. Returns the list of cells restored '''
+        cells = self._all_cells()
+        for cell, display_state in zip(cells, display_states):
+            self._set_display_state(*cell, display_state)
+        return cells
+
+    def _visible(self, row: int, col: int):
+        ''' returns what the cell shows: 0 closed, 1 flagged, 2 a mine, or 3 plus its adjoining mines '''
+        display_state = self._get_display_state(row, col)
+        if display_state != DisplayState.opened:
+            return display_state.value
+        game_state = self._get_game_state(row, col)
+        if game_state == GameState.mined:
+            return 2
+        return 3 if game_state == GameState.clear else 3 + game_state
+
+    def zobrist(self):
+        ''' returns the 64-bit Zobrist hash of what the cells show, kept up to date from the first call on '''
+        if self._hash is None:
+            self._hash = self._full_hash()
+        return self._hash
+
+    def _full_hash(self):
+        ''' computes the hash of the visible state from all cells '''
+        if self._closed == self._rows * self._columns and not self._lost:
+            return 0  # all cells closed
+        h = 0
+        columns = self._columns
+        for i in range(self._rows):
+            for j in range(columns):
+                if self._get_display_state(i, j) != DisplayState.closed:
+                    h ^= _zobrist(i * columns + j, self._visible(i, j))
+        return h
+
+    def _hash_change(self, cells: list, display_state: DisplayState):
+        ''' updates the kept hash for cells that all showed the display state, or from all cells without cells '''
+        if self._hash is None:
+            return
+        if cells is None:
+            self._hash = self._full_hash()
+            return
+        h, columns = self._hash, self._columns
+        for row, col in cells:
+            k = row * columns + col
+            h ^= _zobrist(k, display_state.value) ^ _zobrist(k, self._visible(row, col))
+        self._hash = h
+
+    def frontier(self):
+        ''' returns the board's own dict of every closed cell adjoining opened numbered cells to the set of them '''
+        if self._frontier is None:
+            self._full_frontier()
+        return self._frontier
+
+    def constraints(self):
+        ''' returns the board's own dict of every opened numbered cell adjoining closed cells to the set of them '''
+        if self._frontier is None:
+            self._full_frontier()
+        return self._constraints
+
+    def _is_numbered(self, row: int, col: int):
+        ''' checks if the cell is opened and shows the number of its adjoining mines, clear cells showing none '''
+        return self._get_display_state(row, col) == DisplayState.opened and \
+            self._get_game_state(row, col) != GameState.mined
+
+    def _closed_off_frontier(self):
+        ''' returns a closed cell off the frontier, or None if every closed cell is on it '''
+        if self._frontier is None:
+            self._full_frontier()
+        if not self._off_rows:
+            return None
+        row = next(iter(self._off_rows))
+        start = row * self._columns
+        return row, self._off.index(1, start, start + self._columns) - start
+
+    def _full_frontier(self):
+        ''' finds the frontier, and the closed cells off it, from all cells '''
+        rows, columns = self._rows, self._columns
+        self._frontier, self._constraints = {}, {}
+        self._off = bytearray(rows * columns)  # 1 for a closed cell off the frontier, 0 otherwise
+        self._off_rows = {}  # row -> number of closed cells off the frontier, for rows that have any
+        if self._lost:
+            return  # all cells opened
+        if self._closed == rows * columns:
+            # all cells closed, none of them on the frontier
+            self._off = bytearray(b"\x01") * (rows * columns)
+            self._off_rows = dict.fromkeys(range(rows), columns) if columns else {}
+            return
+        numbered = []
+        for i in range(rows):
+            for j in range(columns):
+                display_state = self._get_display_state(i, j)
+                if display_state == DisplayState.closed:
+                    self._off[i * columns + j] = 1
+                elif display_state == DisplayState.opened and self._get_game_state(i, j) != GameState.mined:
+                    numbered.append((i, j))
+        self._link(numbered)
+        for row, col in self._frontier:
+            self._off[row * columns + col] = 0
+        for row in range(rows):
+            count = self._off.count(1, row * columns, (row + 1) * columns)
+            if count:
+                self._off_rows[row] = count
+
+    def _frontier_change(self, cells: list):
+        ''' updates the kept frontier for cells whose display state changed, or from all cells without cells '''
+        if self._frontier is None:
+            return
+        if cells is None:
+            self._full_frontier()
+            return
+        # unlink the cells from their old sides, then link them again from what they show now
+        affected = set()
+        for cell in cells:
+            affected.add(cell)
+            affected.update(self._adjoining(*cell))
+            for side, other_side in ((self._frontier, self._constraints), (self._constraints, self._frontier)):
+                for other in side.pop(cell, ()):
+                    linked = other_side[other]
+                    linked.discard(cell)
+                    if not linked:
+                        del other_side[other]
+        self._link(cells)
+        # only the changed cells and the cells adjoining them can have moved on or off the frontier
+        self._count_off(affected)
+
+    def _count_off(self, cells):
+        ''' marks which of the cells are closed cells off the frontier, and counts them per row '''
+        off, off_rows, frontier, columns = self._off, self._off_rows, self._frontier, self._columns
+        for row, col in cells:
+            k = row * columns + col
+            now = (row, col) not in frontier and self._get_display_state(row, col) == DisplayState.closed
+            if now != off[k]:
+                off[k] = now
+                count = off_rows.get(row, 0) + (1 if now else -1)
+                if count:
+                    off_rows[row] = count
+                else:
+                    del off_rows[row]
+
+    def _link(self, cells: list):
+        ''' links the cells to the cells adjoining them across the frontier '''
+        frontier, constraints = self._frontier, self._constraints
+        for cell in cells:
+            display_state = self._get_display_state(*cell)
+            if display_state == DisplayState.closed:
+                numbered = [adj for adj in self._adjoining(*cell) if self._is_numbered(*adj)]
+                if numbered:
+                    frontier.setdefault(cell, set()).update(numbered)
+                    for adj in numbered:
+                        constraints.setdefault(adj, set()).add(cell)
+            elif display_state == DisplayState.opened and self._get_game_state(*cell) != GameState.mined:
+                closed = [adj for adj in self._adjoining(*cell)
+                          if self._get_display_state(*adj) == DisplayState.closed]
+                if closed:
+                    constraints.setdefault(cell, set()).update(closed)
+                    for adj in closed:
+                        frontier.setdefault(adj, set()).add(cell)
 
-        if move == Move.clear:
-            # _check_move ensures that only display state possible here is DisplayState.flagged
-            self._flags += 1
-            cell._display_state = DisplayState.closed
+    def snapshot(self):
+        ''' returns a snapshot of the board to restore later. Moves are only logged from the first snapshot on '''
+        if self._log is None:
+            self._log = []
+        return len(self._log)
+
+    def restore(self, snapshot: int):
+        ''' restores the board to a snapshot by undoing the moves applied since. Returns the list of cells whose
+        display state changed.
+        '''
+        return self.undo(len(self._log or ()) - snapshot)
+
+    def undo(self, moves: int = 1):
+        ''' undoes the last moves that changed the board since the first snapshot. Returns the cells changed '''
+        if self._journal is not None:
+            raise InvalidInputError("moves of a journaled board cannot be undone")
+        log = self._log or []
+        if moves > len(log):
+            raise InvalidInputError("only {} moves can be undone".format(len(log)))
+        changed = []  # the cells of every move undone
+        for _ in range(moves):
+            self._closed, self._flags, self._flagged_mines, self._lost, cells, display_state = log.pop()
+            if display_state is None:
+                changed.append(self._restore_display(cells))
+                self._hash_change(None, None)
+                self._frontier_change(None)
+                continue
+            # the change of the hash back to the display state is the same as the change from it
+            self._hash_change(cells, display_state)
+            self._restore_cells(cells, display_state)
+            self._frontier_change(cells)
+            changed.append(cells)
+        # the cells of a single move are returned as the move returned them
+        return changed[0] if len(changed) == 1 else [cell for cells in changed for cell in cells]
+
+    def _restore_cells(self, cells: list, display_state: DisplayState):
+        ''' sets the display state of the cells back to the one they all had before a move '''
+        for cell in cells:
+            self._set_display_state(*cell, display_state)
+
+    def _reveal(self):
+        ''' sets the state of cells to open to end the game. Returns the list of cells revealed '''
+        cells = self._all_cells()
+        for cell in cells:
+            self._set_display_state(*cell, DisplayState.opened)
+        return cells
 
     def _open_adjoining_clear(self, row: int, col: int):
-        ''' tries to open all adjoining cells that are clear '''
-        adjoining_cells = [
-            (row-1, col-1), (row-1, col), (row-1, col+1),
-            (row, col-1), (row, col+1),
-            (row+1, col-1), (row+1, col), (row+1, col+1),
-        ]
-
-        valid_cells = list(filter(lambda t: t[0] >= 0 and t[0] <
-                                  self._rows and t[1] >= 0 and t[1] < self._columns, adjoining_cells))
-        for adj_row, adj_col in valid_cells:
-            adj_cell = self.cells[adj_row][adj_col]
-            if adj_cell._display_state == DisplayState.closed and adj_cell._game_state != GameState.mined:
-                adj_cell._display_state = DisplayState.opened
-                if adj_cell._game_state == GameState.clear:
-                    self._open_adjoining_clear(adj_row, adj_col)
+        ''' opens the closed cells adjoining the clear cell, and on from those that are clear too. Returns them '''
+        # an explicit stack instead of recursion, each cell pushed once when it is opened
+        opened = []
+        stack = [(row, col)]
+        while stack:
+            row, col = stack.pop()
+            for adj_row, adj_col in self._adjoining(row, col):
+                if self._get_display_state(adj_row, adj_col) != DisplayState.closed:
+                    continue
+                adj_game_state = self._get_game_state(adj_row, adj_col)
+                if adj_game_state == GameState.mined:
+                    continue
+                self._set_display_state(
+                    adj_row, adj_col, DisplayState.opened)
+                opened.append((adj_row, adj_col))
+                if adj_game_state == GameState.clear:
+                    stack.append((adj_row, adj_col))
+        return opened
 
     def refresh_display(self):
         ''' prints the current state of the board '''
@@ -208,38 +814,831 @@ class board(object):
         print("{} flags remaining".format(self._flags))
         print("{} {}".format(" ", [str(i) for i in range(self._columns)]))
         for i in range(self._rows):
-            print("{} {}".format(i, [str(cell) for cell in self.cells[i]]))
+            print("{} {}".format(i, [self._cell_str(i, j) for j in range(self._columns)]))
         print("*".join([" " for i in range(20)]))
 
     def more_moves_remaining(self):
         ''' checks if there are more moves remaining '''
-        # if a cell is still in closed state, then there are more moves possible
-        for i in range(self._rows):
-            if any([cell._display_state == DisplayState.closed for cell in self.cells[i]]):
-                return True
-        # otherwise if any flags are remainging then there are more moves possible
-        return self._flags > 0
+        # if a cell is still in closed state, or any flags are remaining, then there are more moves possible
+        return self._closed > 0 or self._flags > 0
+
+    def status(self):
+        ''' returns the status of the game. The game is:
+        - lost, once a mined cell is opened
+        - won, once no cell is closed and every mine is flagged
+        - in progress otherwise
+        '''
+        if self._lost:
+            return GameStatus.lost
+        if self._closed == 0 and self._flagged_mines == self._mines:
+            return GameStatus.won
+        return GameStatus.in_progress
+
+
+class arrayboard(board):
+    ''' arrayboard is a board that keeps cell states in two contiguous buffers instead of a cell object per position.
+    Each position costs two bytes:
+    - game state is a signed byte: -1 for a mined cell, 0 for a clear cell, or the number of adjoining mines
+    - display state is a byte holding the DisplayState value
+    '''
+
+    def _init_cells(self, game_states: bytearray):
+        self._game_states = array('b', game_states)
+        self._display_states = bytearray(len(game_states))
+
+    def _get_game_state(self, row: int, col: int):
+        return _GAME_STATES[self._game_states[row * self._columns + col] + 1]
+
+    def _set_game_state(self, row: int, col: int, game_state):
+        if isinstance(game_state, GameState):
+            game_state = game_state.value
+        self._game_states[row * self._columns + col] = game_state
+
+    def _get_display_state(self, row: int, col: int):
+        return _DISPLAY_STATES[self._display_states[row * self._columns + col]]
+
+    def _set_display_state(self, row: int, col: int, display_state: DisplayState):
+        self._display_states[row * self._columns + col] = display_state.value
+
+    def _state_bytes(self):
+        return bytes(self._game_states).translate(_MINED_BYTES), bytes(self._display_states)
+
+    def _display_copy(self):
+        return bytes(self._display_states)
+
+    def _restore_display(self, display_states: bytes):
+        self._display_states[:] = display_states
+        return self._all_cells()
+
+    def _open_adjoining_clear(self, row: int, col: int):
+        # same walk as board._open_adjoining_clear, on flat buffer offsets instead of the accessors.
+        # only clear cells are expanded and a clear cell has no adjoining mines, so closed neighbors are never mined.
+        columns = self._columns
+        game_states, display_states = self._game_states, self._display_states
+        adjoining = self._adjoining_positions
+        closed, opened_state = DisplayState.closed.value, DisplayState.opened.value
+        opened = []
+        stack = [row * columns + col]
+        while stack:
+            for adj in adjoining(stack.pop()):
+                if display_states[adj] == closed:
+                    display_states[adj] = opened_state
+                    opened.append(adj)
+                    if game_states[adj] == 0:
+                        stack.append(adj)
+        return [divmod(adj, columns) for adj in opened]
+
+
+class lazyboard(arrayboard):
+    ''' lazyboard is an arrayboard that defers placing the mines until the first cell is opened, so creating a board
+    costs no more than allocating its buffers, and the first opened cell can never be mined.
+    The mines are placed around the first opened cell, keeping it and its adjoining cells clear when there is room
+    for the mines elsewhere, or only the cell itself otherwise. The number of adjoining mines of a cell is counted
+    the first time the cell is read, which is mostly when it is opened, and kept for later reads.
+    Game states are stored as unsigned bytes: 0 for a cell not counted yet, 1 for a mined cell, or 2 plus the number
+    of adjoining mines.
+    '''
+
+    def __init__(self, rows: int, columns: int, mines: int, seed=None, topology: Topology = Topology.square):
+        self._init_counters(rows, columns, mines, topology)
+        self._rng = _rng(seed)
+        self._mine_cells = None  # placed on the first open
+        self._game_states = bytearray(rows * columns)
+        self._display_states = bytearray(rows * columns)
+
+    def _place(self, row: int = None, col: int = None):
+        ''' places the mines, keeping the opened cell, if any, and if there is room its adjoining cells clear '''
+        rows, columns = self._rows, self._columns
+        safe = []
+        if row is not None:
+            safe = [(row, col)] + self._adjoining(row, col)
+        if safe and rows * columns - len(safe) < self._mines:
+            safe = [(row, col)] if rows * columns > self._mines else []
+        self._set_mines(_place_mines(rows, columns, self._mines, self._rng, safe))
+
+    def _set_mines(self, mine_cells: list):
+        ''' places the mines on the specified cells '''
+        self._mine_cells = mine_cells
+        columns = self._columns
+        flagged = DisplayState.flagged.value
+        for mine_row, mine_col in self._mine_cells:
+            k = mine_row * columns + mine_col
+            self._game_states[k] = 1
+            self._flagged_mines += self._display_states[k] == flagged
+
+    def _state(self, k: int):
+        ''' returns the stored game state of a cell, counting its adjoining mines if they are not counted yet '''
+        game_states = self._game_states
+        state = game_states[k]
+        if state == 0:
+            state = 2 + sum(game_states[adj] == 1 for adj in self._adjoining_positions(k))
+            game_states[k] = state
+        return state
+
+    def _get_adjoining_mines(self, row: int, col: int):
+        if self._mine_cells is None:
+            return 0
+        k = row * self._columns + col
+        state = self._state(k)
+        if state == 1:
+            return sum(self._game_states[adj] == 1 for adj in self._adjoining_positions(k))
+        return state - 2
+
+    def _get_game_state(self, row: int, col: int):
+        if self._mine_cells is None:
+            return GameState.clear
+        return _GAME_STATES[self._state(row * self._columns + col) - 1]
+
+    def _set_game_state(self, row: int, col: int, game_state):
+        # only whether the cell is mined is stored; the counts around it are forgotten, to be counted again
+        k = row * self._columns + col
+        for adj in self._adjoining_positions(k):
+            if self._game_states[adj] != 1:
+                self._game_states[adj] = 0
+        self._game_states[k] = 1 if game_state == GameState.mined else 0
+
+    def _state_bytes(self):
+        # placing the mines here would lose the first open its guarantee of a clear cell
+        if self._mine_cells is None:
+            raise InvalidInputError("the mines are placed on the first open, a board cannot be saved before it")
+        return bytes(self._game_states).translate(_LAZY_MINED_BYTES), bytes(self._display_states)
+
+    def _apply(self, row: int, col: int, move: Move):
+        if self._mine_cells is None and move == Move.open and 0 <= row < self._rows and 0 <= col < self._columns \
+                and self._get_display_state(row, col) == DisplayState.closed:
+            self._place(row, col)
+        return super()._apply(row, col, move)
+
+    def _open_adjoining_clear(self, row: int, col: int):
+        # same walk as arrayboard._open_adjoining_clear, counting the adjoining mines of the cells it opens
+        columns = self._columns
+        display_states = self._display_states
+        adjoining = self._adjoining_positions
+        closed, opened_state = DisplayState.closed.value, DisplayState.opened.value
+        opened = []
+        stack = [row * columns + col]
+        while stack:
+            for adj in adjoining(stack.pop()):
+                if display_states[adj] == closed:
+                    display_states[adj] = opened_state
+                    opened.append(adj)
+                    if self._state(adj) == 2:
+                        stack.append(adj)
+        return [divmod(adj, columns) for adj in opened]
+
+
+# map bits stored a byte per cell to binary digits, and back
+_BIT_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_DIGIT_BYTES = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def _bit_count(bits: int):
+    ''' returns the number of set bits of an integer '''
+    return bin(bits).count("1")
+
+
+def _bit_positions(bits: int):
+    ''' returns the positions of the set bits of an integer, lowest first '''
+    digits = format(bits, "b")[::-1]
+    positions = []
+    k = digits.find("1")
+    while k >= 0:
+        positions.append(k)
+        k = digits.find("1", k + 1)
+    return positions
+
+
+def _cells_layer(rows: int, columns: int):
+    ''' returns the layer with the bits of all cells set, rows being columns + 1 bits apart '''
+    cells, count = (1 << columns) - 1, 1
+    while count < rows:
+        cells |= cells << (columns + 1) * count
+        count *= 2
+    return cells & (1 << (columns + 1) * rows) - 1
+
+
+def _random_layer(rng, cells: int, bits: int, density: float):
+    ''' returns a random subset of the bits of cells, every bit being kept with the density rounded to 8 digits '''
+    share = round(256 * density)
+    if share >= 256:
+        return cells
+    layer = 0
+    # a 1 digit ORs in a random layer, adding half of the remaining probability, and a 0 digit ANDs one, halving it
+    for digit in range(8):
+        noise = rng.getrandbits(bits)
+        layer = layer | noise if share >> digit & 1 else layer & noise
+    return layer & cells
+
+
+def _fix_mines(data: bytearray, offset: int, rows: int, columns: int, mines: int, rng):
+    ''' mines or clears uniformly random cells of a board at a bit offset of the data until it has the mines '''
+    stride = columns + 1
+    size = (stride * rows + 7) // 8
+    start = offset >> 3
+    count = _bit_count(int.from_bytes(data[start:start + size + 1], "little") >> (offset & 7) &
+                       _cells_layer(rows, columns))
+    wanted = int(count < mines)
+    while count != mines:
+        row, col = divmod(rng.randrange(rows * columns), columns)
+        k = offset + row * stride + col
+        if data[k >> 3] >> (k & 7) & 1 != wanted:
+            data[k >> 3] ^= 1 << (k & 7)
+            count += 1 if wanted else -1
+
+
+def _count_planes(mined: int, cells: int, stride: int):
+    ''' returns the adjoining mines of all cells as four bit planes, lowest first, and the layer of clear cells '''
+    # the 8 shifted copies of the mined layer are added into the planes with bitwise adders
+    planes = [0, 0, 0, 0]
+    for shift in (1, stride - 1, stride, stride + 1):
+        for carry in (mined << shift & cells, mined >> shift & cells):
+            for i in range(4):
+                planes[i], carry = planes[i] ^ carry, planes[i] & carry
+    return planes, cells & ~(mined | planes[0] | planes[1] | planes[2] | planes[3])
+
+
+def _layer_bytes(bits: int, rows: int, columns: int):
+    ''' returns a layer as a byte per cell in row major order, 1 for a set bit and 0 otherwise '''
+    stride = columns + 1
+    digits = format(bits, "b")[::-1].encode().ljust(stride * rows, b"0")
+    return b"".join(digits[k:k + columns] for k in range(0, stride * rows, stride)).translate(_DIGIT_BYTES)
+
+
+def _bytes_layer(values: bytes, columns: int):
+    ''' returns the layer of the cells whose value is 1, from a byte per cell in row major order, 0 or 1 '''
+    digits = values.translate(_BIT_DIGITS)
+    padded = b"0".join(digits[k:k + columns] for k in range(0, len(digits), columns))
+    return int(padded[::-1], 2) if padded else 0
+
+
+def _dilate(bits: int, stride: int):
+    ''' returns the bits and the bits adjoining them, leaving the padding bit of each row for the caller to mask '''
+    bits |= bits << 1 | bits >> 1
+    return bits | bits << stride | bits >> stride
+
+
+class _bitcells(object):
+    ''' the cells of a bitboard layer cut from a first row, after a list of cells, made into tuples when read '''
+
+    def __init__(self, bits: int, stride: int, first_row: int = 0, first: list = ()):
+        self._bits = bits
+        self._stride = stride
+        self._first_row = first_row
+        self._first = list(first)
+        self._count = len(self._first) + _bit_count(bits)
+        self._cells = None
+
+    def __len__(self):
+        return self._count
+
+    def __radd__(self, cells: list):
+        return _bitcells(self._bits, self._stride, self._first_row, list(cells) + self._first)
+
+    def __add__(self, cells: list):
+        return self._list() + list(cells)
+
+    def _list(self):
+        if self._cells is None:
+            stride, first_row = self._stride, self._first_row
+            self._cells = self._first + [(first_row + i, j) for i, j in
+                                         (divmod(k, stride) for k in _bit_positions(self._bits))]
+        return self._cells
+
+    def __iter__(self):
+        return iter(self._list())
+
+    def __getitem__(self, index):
+        return self._list()[index]
+
+    def layer(self):
+        ''' returns the layer of all the cells, on the whole board '''
+        bits = self._bits << self._first_row * self._stride
+        for row, col in self._first:
+            bits |= 1 << row * self._stride + col
+        return bits
+
+
+class bitboard(board):
+    ''' bitboard is a board that keeps each layer of cell states in one integer with a bit per cell: the mined cells,
+    the opened cells, the flagged cells, and the numbers of adjoining mines as four bit planes. Row r starts at bit
+    r * (columns + 1); the bit ending every row is always 0, so shifting a layer by a column never carries a cell
+    into the next row.
+    Work over the whole board, like placing the mines, counting adjoining mines, flood fills and revealing the
+    board, takes a few shifts, ANDs and ORs of the layers instead of a loop over cells. Reading or changing a single
+    cell costs an operation on a whole layer though, so on large boards single cells cost more than on an arrayboard.
+    Only the square topology is supported.
+    '''
+
+    def __init__(self, rows: int, columns: int, mines: int, seed=None):
+        self._init_counters(rows, columns, mines)
+        self._layout()
+        self._set_mined(self._place(_rng(seed)))
+
+    def _layout(self):
+        ''' sets up the row stride and the layer of all cells, with every cell closed '''
+        self._stride = self._columns + 1
+        self._cells = _cells_layer(self._rows, self._columns)
+        self._opened = self._flagged = 0
+
+    def _place(self, rng):
+        ''' returns the layer of mined cells '''
+        rows, columns, stride = self._rows, self._columns, self._stride
+        if not 0 <= self._mines <= rows * columns:
+            raise ValueError("cannot place {} mines on {} cells".format(self._mines, rows * columns))
+        density = self._mines / (rows * columns) if rows * columns else 0
+        mined = _random_layer(rng, self._cells, stride * rows, density)
+        if _bit_count(mined) == self._mines:
+            return mined
+        data = bytearray(mined.to_bytes((stride * rows + 7) // 8, "little"))
+        _fix_mines(data, 0, rows, columns, self._mines, rng)
+        return int.from_bytes(data, "little")
+
+    def _set_mined(self, mined: int):
+        ''' sets the layer of mined cells, and counts the adjoining mines of all cells '''
+        self._mined = mined
+        self._counts, self._clear = _count_planes(mined, self._cells, self._stride)
+
+    def _init_cells(self, game_states: bytearray):
+        self._layout()
+        self._set_mined(_bytes_layer(bytes(game_states).translate(_MINED_BYTES), self._columns))
+
+    def _cell_bytes(self, bits: int):
+        ''' returns a layer as a byte per cell in row major order, 1 for a set bit and 0 otherwise '''
+        return _layer_bytes(bits, self._rows, self._columns)
+
+    def _get_game_state(self, row: int, col: int):
+        k = row * self._stride + col
+        if self._mined >> k & 1:
+            return GameState.mined
+        return _GAME_STATES[1 + sum((plane >> k & 1) << i for i, plane in enumerate(self._counts))]
+
+    def _set_game_state(self, row: int, col: int, game_state):
+        # only whether the cell is mined is stored; the counts of the whole board are taken again
+        bit = 1 << row * self._stride + col
+        self._set_mined(self._mined | bit if game_state == GameState.mined else self._mined & ~bit)
+
+    def _get_adjoining_mines(self, row: int, col: int):
+        k = row * self._stride + col
+        return sum((plane >> k & 1) << i for i, plane in enumerate(self._counts))
+
+    def _get_display_state(self, row: int, col: int):
+        k = row * self._stride + col
+        if self._opened >> k & 1:
+            return DisplayState.opened
+        if self._flagged >> k & 1:
+            return DisplayState.flagged
+        return DisplayState.closed
+
+    def _set_display_state(self, row: int, col: int, display_state: DisplayState):
+        bit = 1 << row * self._stride + col
+        self._opened = self._opened | bit if display_state == DisplayState.opened else self._opened & ~bit
+        self._flagged = self._flagged | bit if display_state == DisplayState.flagged else self._flagged & ~bit
+
+    def _state_bytes(self):
+        size = self._rows * self._columns
+        opened = int.from_bytes(self._cell_bytes(self._opened), "little")
+        flagged = int.from_bytes(self._cell_bytes(self._flagged), "little")
+        display_states = (opened * DisplayState.opened.value | flagged * DisplayState.flagged.value)
+        return self._cell_bytes(self._mined), display_states.to_bytes(size, "little")
+
+    def _display_copy(self):
+        return self._opened, self._flagged
+
+    def _all_cells(self):
+        return _bitcells(self._cells, self._stride)
+
+    def _restore_display(self, display_states: tuple):
+        self._opened, self._flagged = display_states
+        return self._all_cells()
+
+    def _restore_cells(self, cells, display_state: DisplayState):
+        if not isinstance(cells, _bitcells):
+            return super()._restore_cells(cells, display_state)
+        layer = cells.layer()
+        self._opened = self._opened | layer if display_state == DisplayState.opened else self._opened & ~layer
+        self._flagged = self._flagged | layer if display_state == DisplayState.flagged else self._flagged & ~layer
+
+    def _reveal(self):
+        self._opened, self._flagged = self._cells, 0
+        return self._all_cells()
+
+    def _open_adjoining_clear(self, row: int, col: int):
+        # the clear region is grown a ring at a time, then opened with the cells around it, which are never mined.
+        # It grows within a window of rows cut out of the layers, doubled whenever the region reaches its edge.
+        stride, rows = self._stride, self._rows
+        low, high, margin = row, row + 1, 4
+        region = 1 << col
+        while True:
+            window_low, window_high = max(0, low - margin), min(rows, high + margin)
+            region <<= (low - window_low) * stride
+            low, high = window_low, window_high
+            shift, mask = low * stride, (1 << (high - low) * stride) - 1
+            # every row of the cells layer is the same, so its first rows are the cells of the window
+            closed = self._cells & mask & ~((self._opened | self._flagged) >> shift)
+            clear = self._clear >> shift & mask & (closed | region)
+            while True:
+                grown = _dilate(region, stride) & clear
+                if grown == region:
+                    break
+                region = grown
+            # a region reaching the first or last row of the window may go on past it, unless the board ends there
+            edge = (1 << stride) - 1
+            edges = (edge if low > 0 else 0) | (edge << (high - low - 1) * stride if high < rows else 0)
+            if not region & edges:
+                break
+            margin *= 2
+        opened = _dilate(region, stride) & closed
+        self._opened |= opened << shift
+        return _bitcells(opened, stride, low)
+
+
+class mappedboard(board):
+    ''' mappedboard is a board read from a file saved by board.save. The file is memory-mapped and cells are read
+    from it on demand, so opening even a huge board takes no time. The numbers of adjoining mines are counted
+    from the mine bitmap when a cell is read.
+    The mapping is copy-on-write: moves change the board in memory, not the file.
+    '''
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, topology, self._rows, self._columns, self._mines, self._flags, self._closed, \
+            self._flagged_mines, lost = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION or topology >= len(Topology):
+            raise InvalidInputError("not a board file: " + path)
+        self._topology = Topology(topology)
+        self._lost = bool(lost)
+        self._mines_offset = _HEADER.size
+        self._display_offset = self._mines_offset + \
+            -(-self._rows * self._columns // 8)
+
+    def _is_mined(self, row: int, col: int):
+        k = row * self._columns + col
+        return self._map[self._mines_offset + (k >> 3)] >> (k & 7) & 1
+
+    def _get_adjoining_mines(self, row: int, col: int):
+        return sum(self._is_mined(i, j) for i, j in self._adjoining(row, col))
+
+    def _get_game_state(self, row: int, col: int):
+        if self._is_mined(row, col):
+            return GameState.mined
+        return _GAME_STATES[self._get_adjoining_mines(row, col) + 1]
+
+    def _set_game_state(self, row: int, col: int, game_state):
+        # only the mine bitmap is stored, the numbers of adjoining mines follow from it
+        k = row * self._columns + col
+        offset = self._mines_offset + (k >> 3)
+        if game_state == GameState.mined:
+            self._map[offset] |= 1 << (k & 7)
+        else:
+            self._map[offset] &= ~(1 << (k & 7)) & 0xFF
+
+    def _get_display_state(self, row: int, col: int):
+        k = row * self._columns + col
+        return _DISPLAY_STATES[self._map[self._display_offset + (k >> 2)] >> 2 * (k & 3) & 3]
+
+    def _set_display_state(self, row: int, col: int, display_state: DisplayState):
+        k = row * self._columns + col
+        offset = self._display_offset + (k >> 2)
+        shift = 2 * (k & 3)
+        self._map[offset] = self._map[offset] & ~(3 << shift) & 0xFF | display_state.value << shift
+
+    def _display_copy(self):
+        return self._map[self._display_offset:]
+
+    def _restore_display(self, display_states: bytes):
+        self._map[self._display_offset:] = display_states
+        return self._all_cells()
+
+
+def load(path: str, mapped: bool = True):
+    ''' loads a board saved by board.save. By default the file is memory-mapped as a mappedboard; otherwise it is
+    unpacked into an arrayboard.
+    '''
+    if mapped:
+        return mappedboard(path)
+    source = mappedboard(path)
+    rows, columns = source._rows, source._columns
+    packed = source._map[source._mines_offset:source._display_offset]
+    mined = _unpack(packed, 1, rows * columns)
+    b = arrayboard.__new__(arrayboard)
+    for name in ("_rows", "_columns", "_mines", "_flags", "_closed", "_flagged_mines", "_lost", "_topology"):
+        setattr(b, name, getattr(source, name))
+    b._mine_cells = []
+    k = mined.find(1)
+    while k >= 0:
+        b._mine_cells.append(divmod(k, columns))
+        k = mined.find(1, k + 1)
+    b._init_cells(_game_state_grid(rows, columns, b._mine_cells, b._topology))
+    b._display_states = _unpack(source._map[source._display_offset:], 2, rows * columns)
+    source._map.close()
+    return b
+
+
+class chunkedboard(board):
+    ''' chunkedboard is a board that is generated lazily, chunk by chunk, so it can be effectively unbounded.
+    The board is split into chunks of chunk_size x chunk_size cells. The mines of a chunk are placed the first time
+    the chunk is touched, from a random generator seeded with the seed and the chunk position, so the same seed
+    always gives the same board. Each chunk holds the share of the mines of its cells, so the actual number of mines
+    can differ slightly from the number requested.
+    Only the display states of opened and flagged cells are stored, per chunk. At most cache_chunks chunks are kept
+    in memory; the least recently used chunk is evicted, and written to spill_dir if it holds display states, to be
+    read back when it is touched again.
+    '''
+
+    def __init__(self, rows: int, columns: int, mines: int, seed=None, chunk_size: int = 64, cache_chunks: int = 256,
+                 spill_dir: str = None):
+        if seed is None:
+            seed = random.getrandbits(64)
+        if isinstance(seed, random.Random):
+            seed = seed.getrandbits(64)
+        self._seed = seed
+        self._chunk_size = chunk_size
+        self._density = mines / (rows * columns) if rows * columns > 0 else 0
+
+        # the actual number of mines, summed over the full and partial chunks along each axis
+        heights = {chunk_size: rows // chunk_size, rows % chunk_size: 1}
+        widths = {chunk_size: columns // chunk_size, columns % chunk_size: 1}
+        mines = sum(round(self._density * height * width) * height_count * width_count
+                    for height, height_count in heights.items() if height > 0
+                    for width, width_count in widths.items() if width > 0)
+        self._init_counters(rows, columns, mines)
+
+        self._chunks = collections.OrderedDict()  # (chunk row, chunk column) -> (game states, display states)
+        self._cache_chunks = cache_chunks
+        self._spill_dir = spill_dir
+        self._spilled = set()  # chunks whose display states are on disk
+        self._revealed = False
+
+    def _chunk_mines(self, chunk_row: int, chunk_col: int):
+        ''' returns the mined cells of a chunk '''
+        top, left = chunk_row * self._chunk_size, chunk_col * self._chunk_size
+        if top < 0 or top >= self._rows or left < 0 or left >= self._columns:
+            return []
+        height = min(self._chunk_size, self._rows - top)
+        width = min(self._chunk_size, self._columns - left)
+        rng = random.Random("{}:{}:{}".format(self._seed, chunk_row, chunk_col))
+        return [(top + row, left + col) for row, col in
+                _place_mines(height, width, round(self._density * height * width), rng)]
+
+    def _load_chunk(self, chunk_row: int, chunk_col: int):
+        ''' generates the game states of a chunk, and reads back its display states if they were spilled '''
+        size = self._chunk_size
+        top, left = chunk_row * size, chunk_col * size
+        height, width = min(size, self._rows - top), min(size, self._columns - left)
+
+        # count adjoining mines over the chunk and a margin of a cell, taking the margin mines from adjoining chunks
+        mines = [(row - top + 1, col - left + 1) for i in (-1, 0, 1) for j in (-1, 0, 1)
+                 for row, col in self._chunk_mines(chunk_row + i, chunk_col + j)
+                 if top - 1 <= row <= top + height and left - 1 <= col <= left + width]
+        grid = _game_state_grid(height + 2, width + 2, mines)
+        game_states = array('b', bytes(height * size))
+        for row in range(height):
+            start = (row + 1) * (width + 2) + 1
+            game_states[row * size:row * size + width] = array('b', grid[start:start + width])
+
+        display_states = {}
+        if (chunk_row, chunk_col) in self._spilled:
+            with open(self._spill_path(chunk_row, chunk_col), "rb") as f:
+                data = f.read()
+            (count,) = struct.unpack_from("<I", data)
+            cells = array('I')
+            cells.frombytes(data[4:4 + 4 * count])
+            display_states = dict(zip(cells, data[4 + 4 * count:]))
+        return game_states, display_states
+
+    def _spill_path(self, chunk_row: int, chunk_col: int):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="minesweeper-")
+        return os.path.join(self._spill_dir, "{}_{}.chunk".format(chunk_row, chunk_col))
+
+    def _evict(self):
+        ''' evicts the least recently used chunk, writing its display states to disk if it has any '''
+        key, (_, display_states) = self._chunks.popitem(last=False)
+        if display_states:
+            with open(self._spill_path(*key), "wb") as f:
+                f.write(struct.pack("<I", len(display_states)))
+                f.write(array('I', display_states.keys()).tobytes())
+                f.write(bytes(display_states.values()))
+            self._spilled.add(key)
+        elif key in self._spilled:
+            os.remove(self._spill_path(*key))
+            self._spilled.discard(key)
+
+    def _chunk(self, row: int, col: int):
+        ''' returns the chunk holding a cell, and the index of the cell in the chunk '''
+        size = self._chunk_size
+        key = (row // size, col // size)
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            chunk = self._chunks[key] = self._load_chunk(*key)
+            if len(self._chunks) > self._cache_chunks:
+                self._evict()
+        else:
+            self._chunks.move_to_end(key)
+        return chunk, (row % size) * size + col % size
+
+    def _get_adjoining_mines(self, row: int, col: int):
+        return sum(self._get_game_state(i, j) == GameState.mined
+                   for i in range(max(row - 1, 0), min(row + 2, self._rows))
+                   for j in range(max(col - 1, 0), min(col + 2, self._columns)) if (i, j) != (row, col))
+
+    def _get_game_state(self, row: int, col: int):
+        (game_states, _), index = self._chunk(row, col)
+        return _GAME_STATES[game_states[index] + 1]
+
+    def _set_game_state(self, row: int, col: int, game_state):
+        if isinstance(game_state, GameState):
+            game_state = game_state.value
+        (game_states, _), index = self._chunk(row, col)
+        game_states[index] = game_state
+
+    def _get_display_state(self, row: int, col: int):
+        if self._revealed:
+            return DisplayState.opened
+        (_, display_states), index = self._chunk(row, col)
+        return _DISPLAY_STATES[display_states.get(index, 0)]
+
+    def _set_display_state(self, row: int, col: int, display_state: DisplayState):
+        (_, display_states), index = self._chunk(row, col)
+        if display_state == DisplayState.closed:
+            display_states.pop(index, None)
+        else:
+            display_states[index] = display_state.value
+
+    def _reveal(self):
+        # every cell reads as opened from now on, instead of opening each cell of an unbounded board
+        self._revealed = True
+        return []
+
+    def _display_copy(self):
+        # the reveal does not change the stored display states
+        return None
+
+    def _restore_display(self, display_states):
+        self._revealed = False
+        return []
+
+
+class engine(object):
+    ''' engine applies moves to a board programmatically, for automated players and load tests.
+    Unlike board.try_move, it never raises on invalid moves or when a mine is opened; every move gets a MoveResult.
+    '''
+
+    def __init__(self, board: board):
+        self.board = board
+
+    def apply_moves(self, moves, cells: bool = True):
+        ''' validates and applies an iterable of (row, col, move) tuples in order. Moves made once the game is over
+        result in MoveResult.game_over. Returns a bytearray with the MoveResult value of every move, and the set of
+        cells whose display state changed, or with cells False the number of cells changed.
+        '''
+        results = bytearray()
+        changed = set() if cells else 0
+        b = self.board
+        for row, col, move in moves:
+            if b._lost or not b.more_moves_remaining():
+                results.append(MoveResult.game_over.value)
+                continue
+            result, move_cells = b._apply(row, col, move)
+            results.append(result.value)
+            if cells:
+                changed.update(move_cells)
+            else:
+                changed += len(move_cells)
+        return results, changed
+
+
+class renderer(object):
+    ''' renderer draws a board on an ANSI terminal. It keeps the symbols of the last frame, and redraws only the
+    cells that changed since by moving the cursor to them. Every frame is written to the output in a single write.
+    Messages and input prompts go on the lines below the board.
+    Boards larger than the terminal are drawn through a viewport: a window of height x width cells that can be
+    panned or moved to any cell. Only the cells inside the window are drawn, and its rows and columns are labeled
+    relative to the window.
+    '''
+
+    def __init__(self, board: board, out=None, height: int = None, width: int = None):
+        self.board = board
+        self._out = out if out is not None else sys.stdout
+        self._frame = None  # symbols last drawn inside the window, in row major order
+        self._height = min(height or board.rows(), board.rows())
+        self._width = min(width or board.columns(), board.columns())
+        self._top, self._left = 0, 0
+        self._label_width = len(str(self._height - 1)) + 1
+        self._cell_width = max(3, len(str(self._width - 1)) + 1)
+
+    def _move_to(self, line: int, column: int):
+        ''' returns the escape sequence to move the cursor to a 0-based terminal line and column '''
+        return "\x1b[{};{}H".format(line + 1, column + 1)
+
+    def _cell(self, row: int, col: int, symbol: str):
+        ''' returns the sequence drawing the symbol of a cell at a window position, padded over any wider symbol
+        drawn before it
+        '''
+        width = sum(2 if unicodedata.east_asian_width(c)
+                    in "WF" else 1 for c in symbol)
+        return self._move_to(row + 2, self._label_width + col * self._cell_width) + \
+            symbol + " " * (self._cell_width - width)
+
+    def _status(self, message: str):
+        ''' returns the sequences drawing the remaining flags and the window position above the board, and the
+        message below it
+        '''
+        status = "{} flags remaining".format(self.board._flags)
+        if (self._height, self._width) != (self.board.rows(), self.board.columns()):
+            status += ", rows {}-{} of {}, columns {}-{} of {}".format(
+                self._top, self._top + self._height - 1, self.board.rows(),
+                self._left, self._left + self._width - 1, self.board.columns())
+        return [self._move_to(0, 0), "\x1b[K", status,
+                self._move_to(self._height + 2, 0), "\x1b[J", message + "\n" if message else ""]
+
+    def to_board(self, row: int, col: int):
+        ''' converts a position relative to the window to a position on the board '''
+        return self._top + row, self._left + col
+
+    def pan(self, rows: int, columns: int, message: str = ""):
+        ''' moves the window by the specified number of rows and columns, within the board, and redraws it '''
+        self._top = max(0, min(self._top + rows, self.board.rows() - self._height))
+        self._left = max(0, min(self._left + columns, self.board.columns() - self._width))
+        self.redraw(message)
+
+    def jump(self, row: int, col: int, message: str = ""):
+        ''' moves the window to be centered on the specified board cell, within the board, and redraws it '''
+        self.pan(row - self._height // 2 - self._top,
+                 col - self._width // 2 - self._left, message)
+
+    def redraw(self, message: str = ""):
+        ''' clears the terminal and draws the whole window '''
+        self._frame = [self.board._cell_str(self._top + i, self._left + j)
+                       for i in range(self._height) for j in range(self._width)]
+        parts = ["\x1b[2J"]
+        parts += [self._move_to(1, self._label_width + j * self._cell_width) + str(j)
+                  for j in range(self._width)]
+        for i in range(self._height):
+            parts.append(self._move_to(i + 2, 0) + str(i))
+            parts += [self._cell(i, j, self._frame[i * self._width + j])
+                      for j in range(self._width)]
+        self._write(parts + self._status(message))
+
+    def draw(self, changed, message: str = ""):
+        ''' draws the changed cells inside the window whose symbols differ from the last frame. The whole window is
+        drawn on the first frame.
+        '''
+        if self._frame is None:
+            self.redraw(message)
+            return
+        parts = []
+        for row, col in changed:
+            i, j = row - self._top, col - self._left
+            if i < 0 or i >= self._height or j < 0 or j >= self._width:
+                continue
+            symbol = self.board._cell_str(row, col)
+            if self._frame[i * self._width + j] != symbol:
+                self._frame[i * self._width + j] = symbol
+                parts.append(self._cell(i, j, symbol))
+        self._write(parts + self._status(message))
+
+    def _write(self, parts: list):
+        self._out.write("".join(parts))
+        self._out.flush()
 
 
 class game(object):
     ''' game interfaces with the board through moves to progress the game. '''
 
-    def __init__(self, difficulty="easy"):
+    def __init__(self, difficulty="easy", seed=None, terminal=False, viewport=None, size=None, boards=None):
         ''' initializes the game with specified difficulty. Possible difficulty values are:
         - easy: 8 x 10 board, 10 mines
         - medium: 14 x 18 board, 40 mines
         - hard: 20 x 24 board, 100 mines
+        A custom board is played by passing its (rows, columns, mines) as size instead.
+        The seed, if any, is passed on to the board to place the mines. Mines are only placed when the first cell
+        is opened, so that cell is never mined. With terminal set, the board is drawn
+        by a renderer that redraws only the cells changed by a move, instead of printing the whole board.
+        With a (height, width) viewport, the renderer only draws a window of the board that can be panned and moved,
+        and rows and columns are entered relative to the window.
+        With boards, a noguess.pregenerator, the board is taken from the boards it has generated for the difficulty:
+        a board that can be cleared without guessing, with its first cell already opened.
         '''
-        if difficulty not in ["Easy", "easy", "E", "e", "Medium", "medium", "M", "m", "Difficult", "difficult", "D", "d"]:
-            raise InvalidInputError("Invalid input: " + difficulty)
-
-        rows, cols, mines = 8, 10, 10
-        if difficulty in ["Medium", "medium", "M", "m"]:
-            rows, cols, mines = 14, 18, 40
-        if difficulty in ["Difficult", "difficult", "D", "d"]:
-            rows, cols, mines = 20, 24, 100
+        if boards is not None:
+            self.board = boards.take(difficulty)
+            self._setup_renderer(terminal, viewport)
+            return
+        if size is not None:
+            self.board = lazyboard(*size, seed)
+            self._setup_renderer(terminal, viewport)
+            return
+        rows, cols, mines = PRESETS[_preset(difficulty)]
+        self.board = lazyboard(rows, cols, mines, seed)
+        self._setup_renderer(terminal, viewport)
 
-        self.board = board(rows, cols, mines)
+    def _setup_renderer(self, terminal: bool, viewport):
+        self._viewport = viewport is not None
+        self._renderer = None
+        if terminal or self._viewport:
+            height, width = viewport if self._viewport else (None, None)
+            self._renderer = renderer(self.board, height=height, width=width)
 
     def play(self):
         ''' represents the game. It:
@@ -255,6 +1654,23 @@ class game(object):
             else:
                 return (row, True)
 
+        def validate_row(text):
+            # a row, or when drawing through a viewport a command to pan or jump the viewport
+            row, ok = validate_int(text)
+            if ok or not self._viewport:
+                return (row, ok)
+            rows, cols = max(self._renderer._height // 2, 1), max(self._renderer._width // 2, 1)
+            pans = {"W": (-rows, 0), "w": (-rows, 0), "S": (rows, 0), "s": (rows, 0),
+                    "A": (0, -cols), "a": (0, -cols), "D": (0, cols), "d": (0, cols)}
+            if text in pans:
+                return (("pan", pans[text]), True)
+            words = text.split()
+            if len(words) == 3 and words[0] in ["Jump", "jump", "J", "j"]:
+                (row, row_ok), (col, col_ok) = validate_int(words[1]), validate_int(words[2])
+                if row_ok and col_ok:
+                    return (("jump", (row, col)), True)
+            return (0, False)
+
         def validate_move(text):
             if text not in ["Open", "open", "O", "o", "Flag", "flag", "F", "f", "Clear", "clear", "C", "c"]:
                 return ("", False)
@@ -273,32 +1689,63 @@ class game(object):
             if text in ["No", "no", "N", "n"]:
                 return ("no", True)
 
-        self.board.refresh_display()
-        while self.board.more_moves_remaining():
+        self._show()
+        while self.board.status() == GameStatus.in_progress:
+            changed, message = [], ""
             try:
-                row = self._input(msg="Enter the row: ",
-                                  validator=validate_int)
+                row = self._input(msg="Enter the row, [W/A/S/D] to pan or [J/j]ump ROW COLUMN: " if self._viewport
+                                  else "Enter the row: ", validator=validate_row)
+                if isinstance(row, tuple):
+                    command, (i, j) = row
+                    if command == "pan":
+                        self._renderer.pan(i, j)
+                    else:
+                        self._renderer.jump(i, j)
+                    continue
                 col = self._input(msg="Enter the column: ",
                                   validator=validate_int)
                 move = self._input(
                     msg="Enter your move. [O/o]pen, [F/f]lag, [C/c]lear: ", validator=validate_move)
+                if self._renderer is not None:
+                    row, col = self._renderer.to_board(row, col)
                 self.board.try_move(row, col, move)
+                changed = self.board._last_changed
             except InvalidInputError as e:
-                print(e)
+                message = str(e)
             except OpenedMine as e:
-                print(e)
+                changed, message = None, str(e)
                 return
             except KeyboardInterrupt as e:
                 print()
                 yes_no = self._input(
                     msg="Leave the game. [Y/y]es, [N/n]o: ", validator=validate_yes_no)
+                changed = None
                 if yes_no == "yes":
-                    print("Bye!")
+                    message = "Bye!"
                     return
             finally:
-                self.board.refresh_display()
+                self._show(changed, message)
         print("Hooray!! You won!!")
 
+    def _show(self, changed=None, message=""):
+        ''' shows the message, if any, and the board. On a terminal only the changed cells are redrawn, unless changed
+        is None
+        '''
+        if self.board._instruments is not None:
+            self.board._instruments.render(self._draw, changed, message)
+        else:
+            self._draw(changed, message)
+
+    def _draw(self, changed, message: str):
+        if self._renderer is None:
+            if message:
+                print(message)
+            self.board.refresh_display()
+        elif changed is None:
+            self._renderer.redraw(message)
+        else:
+            self._renderer.draw(changed, message)
+
     def _input(self, msg=None, validator=None):
         ''' accepts a user input and validates it using specified validator '''
         while True:
@@ -313,7 +1760,7 @@ def main():
     try:
         difficulty = input(
             "Enter the difficulty level. [E/e]asy, [M/m]edium OR [D/d]ifficult: ")
-        g = game(difficulty)
+        g = game(difficulty, terminal=sys.stdout.isatty())
         g.play()
     except EOFError:
         print("Bye!")
@@ -0,0 +1,130 @@
+import concurrent.futures
+import queue
+import random
+import threading
+import time
+
+from minesweeper import PRESETS, GameStatus, InvalidInputError, Move, _preset, lazyboard
+from solver import solver
+
+
+def generate(rows: int, columns: int, mines: int, rng=random):
+    ''' generates boards until the solver clears one from its first open, without guessing. The first cell opened
+    is the middle cell, and mines are placed around it as for any lazyboard.
+    Returns the mined cells and the first cell of that board, and the number of boards generated.
+    '''
+    first = (rows // 2, columns // 2)
+    attempts = 0
+    while True:
+        attempts += 1
+        b = lazyboard(rows, columns, mines, rng)
+        b.try_move(*first, Move.open)
+        solver(b).solve()
+        if b.status() == GameStatus.won:
+            return b._mine_cells, first, attempts
+
+
+def _generate(rows: int, columns: int, mines: int, seed: int):
+    ''' generates a board with its own seeded random generator; returns it with the seconds it took '''
+    start = time.perf_counter()
+    mine_cells, first, attempts = generate(rows, columns, mines, random.Random(seed))
+    return mine_cells, first, attempts, time.perf_counter() - start
+
+
+class pregenerator(object):
+    ''' pregenerator keeps a bounded queue of boards that can be cleared without guessing for each difficulty preset,
+    so a game can start at once instead of waiting for boards to be generated and rejected.
+    A producer thread per preset keeps the queue full: it submits as many boards to the executor as are missing
+    from the queue, a process pool by default, and queues them as they complete.
+    '''
+
+    def __init__(self, difficulties=tuple(PRESETS), depth: int = 4, executor=None, seed=None):
+        self._executor = executor or concurrent.futures.ProcessPoolExecutor()
+        self._owns_executor = executor is None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._start = time.perf_counter()
+        self._queues = {}
+        self._stats = {}
+        for difficulty in difficulties:
+            name = _preset(difficulty)
+            self._queues[name] = queue.Queue(maxsize=depth)
+            self._stats[name] = {"generated": 0, "attempts": 0, "seconds": 0.0}
+        self._threads = [threading.Thread(target=self._produce, args=(name,), daemon=True)
+                         for name in self._queues]
+        for thread in self._threads:
+            thread.start()
+
+    def _produce(self, name: str):
+        boards = self._queues[name]
+        rows, columns, mines = PRESETS[name]
+        pending = set()
+        while not self._stop.is_set():
+            # only this thread puts boards in the queue, so the boards pending always fit
+            while len(pending) + boards.qsize() < boards.maxsize:
+                with self._lock:
+                    seed = self._rng.getrandbits(64)
+                pending.add(self._executor.submit(_generate, rows, columns, mines, seed))
+            if not pending:
+                self._stop.wait(0.05)
+                continue
+            done, pending = concurrent.futures.wait(
+                pending, timeout=0.1, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                mine_cells, first, attempts, seconds = future.result()
+                with self._lock:
+                    stats = self._stats[name]
+                    stats["generated"] += 1
+                    stats["attempts"] += attempts
+                    stats["seconds"] += seconds
+                boards.put((mine_cells, first))
+        for future in pending:
+            future.cancel()
+
+    def take(self, difficulty: str, timeout: float = None):
+        ''' returns a board of the difficulty that can be cleared without guessing, with its first cell opened.
+        Waits for a board to be generated if none is queued, for at most timeout seconds if it is set.
+        '''
+        name = _preset(difficulty)
+        if name not in self._queues:
+            raise InvalidInputError("no boards are generated for " + name)
+        mine_cells, first = self._queues[name].get(timeout=timeout)
+        b = lazyboard(*PRESETS[name])
+        b._set_mines(mine_cells)
+        b.try_move(*first, Move.open)
+        return b
+
+    def metrics(self):
+        ''' returns, per preset: the number of boards queued and the queue capacity, the number of boards generated,
+        the boards generated per second since the pregenerator started, the seconds spent generating a board, and
+        the share of generated boards that could be cleared without guessing
+        '''
+        elapsed = time.perf_counter() - self._start
+        metrics = {}
+        with self._lock:
+            for name, boards in self._queues.items():
+                stats = self._stats[name]
+                metrics[name] = {
+                    "depth": boards.qsize(),
+                    "capacity": boards.maxsize,
+                    "generated": stats["generated"],
+                    "boards_per_second": stats["generated"] / elapsed if elapsed > 0 else 0.0,
+                    "seconds_per_board": stats["seconds"] / stats["generated"] if stats["generated"] else 0.0,
+                    "acceptance_rate": stats["generated"] / stats["attempts"] if stats["attempts"] else 0.0,
+                }
+        return metrics
+
+    def close(self):
+        ''' stops the producers, and the executor if the pregenerator created it '''
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import itertools
+import random
+import time
+
+from minesweeper import PRESETS, GameStatus, InvalidInputError, Move, _preset, lazyboard
+
+# the largest window of cells a render answers with
+RENDER_ROWS, RENDER_COLUMNS = 64, 64
+
+
+class server(object):
+    ''' server hosts games over TCP, a session per connection, with a line protocol. Each request is a line, and is
+    answered by a line starting with "ok" or "error":
+    - new [DIFFICULTY|ROWSxCOLUMNSxMINES] [SEED]: starts a new game, replacing the game of the connection if any.
+      Answers "ok SESSION ROWS COLUMNS MINES". Custom boards have at most max_rows rows and max_columns columns.
+    - move ROW COL [open|flag|clear]: plays a move, opening the cell by default. Answers "ok RESULT STATUS FLAGS"
+      followed by a ROW,COL,SYMBOL field per cell changed by the move, so clients only update those cells.
+    - render [ROW COL]: answers "ok ROWS COLUMNS", followed by a line of cell symbols per row of a window of at most
+      RENDER_ROWS x RENDER_COLUMNS cells, from the cell at ROW COL or the first cell.
+    - resign: ends the game, as lost. Answers "ok lost".
+    - stats: answers "ok sessions=SESSIONS cpu=SECONDS", the CPU time used by the server process.
+    - quit: closes the connection.
+    At most max_sessions games are played at a time, and a connection that sends no request for idle_timeout
+    seconds is closed, ending its game.
+    '''
+
+    def __init__(self, max_sessions: int = 10000, idle_timeout: float = 300.0, max_rows: int = 128,
+                 max_columns: int = 128):
+        self._max_sessions = max_sessions
+        self._idle_timeout = idle_timeout
+        # moves run on the event loop, so a board is kept small enough for its flood fill not to stall other sessions
+        self._max_rows = max_rows
+        self._max_columns = max_columns
+        self._sessions = {}  # session id -> board
+        self._ids = itertools.count(1)
+
+    def sessions(self):
+        return len(self._sessions)
+
+    def execute(self, session, line: str):
+        ''' executes a request for the session of a connection, None if it has no game.
+        Returns the session of the connection after the request, and the answer.
+        '''
+        words = line.split()
+        if not words:
+            return session, "error empty request"
+        command, args = words[0], words[1:]
+        try:
+            if command == "new":
+                return self._new(session, args)
+            if command == "stats":
+                return session, "ok sessions={} cpu={:.3f}".format(len(self._sessions), time.process_time())
+            if command not in ("move", "render", "resign"):
+                return session, "error unknown command: " + command
+            if session not in self._sessions:
+                return session, "error no game, start one with new"
+            b = self._sessions[session]
+            if command == "move":
+                return session, self._move(b, args)
+            if command == "render":
+                return session, self._render(b, args)
+            b._closed = 0
+            b._lost = True
+            del self._sessions[session]
+            return None, "ok lost"
+        except (InvalidInputError, ValueError, KeyError, IndexError) as e:
+            return session, "error invalid request: {}".format(e)
+        except MemoryError:
+            return session, "error out of memory"
+
+    def _new(self, session, args: list):
+        # the game of the connection is only replaced once the new one is started
+        if len(self._sessions) - (session in self._sessions) >= self._max_sessions:
+            return session, "error too many sessions"
+        size = args[0] if args else "easy"
+        if "x" in size:
+            rows, columns, mines = (int(value) for value in size.split("x"))
+            if rows <= 0 or columns <= 0 or mines < 0 or mines >= rows * columns:
+                raise InvalidInputError("invalid size: " + size)
+            if rows > self._max_rows or columns > self._max_columns:
+                return session, "error board too large: at most {}x{}".format(self._max_rows, self._max_columns)
+        else:
+            rows, columns, mines = PRESETS[_preset(size)]
+        seed = int(args[1]) if len(args) > 1 else None
+        b = lazyboard(rows, columns, mines, seed)
+        self._sessions.pop(session, None)
+        session = next(self._ids)
+        self._sessions[session] = b
+        return session, "ok {} {} {} {}".format(session, rows, columns, mines)
+
+    def _move(self, b: lazyboard, args: list):
+        row, col = int(args[0]), int(args[1])
+        move = Move[args[2]] if len(args) > 2 else Move.open
+        result, changed = b._apply(row, col, move)
+        return " ".join(["ok", result.name, b.status().name, str(b._flags)] +
+                        ["{},{},{}".format(i, j, b._cell_str(i, j)) for i, j in changed])
+
+    def _render(self, b: lazyboard, args: list):
+        top, left = (int(args[0]), int(args[1])) if args else (0, 0)
+        b._check_cell(top, left)
+        bottom, right = min(top + RENDER_ROWS, b.rows()), min(left + RENDER_COLUMNS, b.columns())
+        return "\n".join(["ok {} {}".format(b.rows(), b.columns())] + [
+            "".join(b._cell_str(i, j) for j in range(left, right)) for i in range(top, bottom)])
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = None
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self._idle_timeout)
+                except asyncio.TimeoutError:
+                    writer.write(b"error idle timeout\n")
+                    break
+                if not line or line.strip() == b"quit":
+                    break
+                session, answer = self.execute(session, line.decode("utf-8", "replace"))
+                writer.write(answer.encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._sessions.pop(session, None)
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8023):
+        ''' starts serving connections, and returns the asyncio server '''
+        return await asyncio.start_server(self._handle, host, port)
+
+
+async def _client(host: str, port: int, moves: int, seed: int, latencies: list):
+    ''' plays random moves over a connection, starting a new game whenever one ends, and records the latency of
+    every move
+    '''
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def request(line: str):
+        writer.write(line.encode("utf-8") + b"\n")
+        await writer.drain()
+        return (await reader.readline()).decode("utf-8").split()
+
+    cells = []
+    for _ in range(moves):
+        if not cells:
+            _, _, rows, columns, _ = await request("new easy {}".format(rng.getrandbits(32)))
+            cells = [(i, j) for i in range(int(rows)) for j in range(int(columns))]
+            rng.shuffle(cells)
+        start = time.perf_counter()
+        answer = await request("move {} {}".format(*cells.pop()))
+        latencies.append(time.perf_counter() - start)
+        if answer[2] != GameStatus.in_progress.name:
+            cells = []
+    writer.write(b"quit\n")
+    await writer.drain()
+    writer.close()
+
+
+def _percentile(values: list, fraction: float):
+    return values[min(int(fraction * len(values)), len(values) - 1)] if values else 0.0
+
+
+async def load(host: str = "127.0.0.1", port: int = 8023, sessions: int = 100, moves: int = 100, seed: int = 0):
+    ''' plays moves from concurrent sessions against a server. Returns the p50 and p99 move latency in seconds, the
+    moves per second, and the sessions per core: the sessions divided by the CPU cores the server kept busy, from
+    the CPU time it reports before and after the load.
+    '''
+    async def server_cpu():
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b"stats\nquit\n")
+        answer = (await reader.readline()).decode("utf-8").split()
+        writer.close()
+        return float(answer[2].split("=")[1])
+
+    latencies = []
+    cpu = await server_cpu()
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, moves, (seed << 32) + i, latencies) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    cores = (await server_cpu() - cpu) / elapsed
+    latencies.sort()
+    return {
+        "sessions": sessions,
+        "moves": len(latencies),
+        "p50": _percentile(latencies, 0.5),
+        "p99": _percentile(latencies, 0.99),
+        "moves_per_second": len(latencies) / elapsed,
+        "sessions_per_core": sessions / cores if cores > 0 else float("inf"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="serve games over TCP, or load a server with concurrent sessions")
+    parser.add_argument("command", choices=["serve", "load"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8023)
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--idle-timeout", type=float, default=300.0)
+    parser.add_argument("--max-rows", type=int, default=128, help="most rows of a custom board")
+    parser.add_argument("--max-columns", type=int, default=128, help="most columns of a custom board")
+    parser.add_argument("--sessions", type=int, default=100, help="concurrent sessions to load the server with")
+    parser.add_argument("--moves", type=int, default=100, help="moves per session")
+    args = parser.parse_args()
+
+    if args.command == "load":
+        result = asyncio.run(load(args.host, args.port, args.sessions, args.moves))
+        print("{sessions} sessions, {moves} moves, p50 {p50_ms:.2f} ms, p99 {p99_ms:.2f} ms, "
+              "{moves_per_second:.0f} moves/sec, {sessions_per_core:.0f} sessions/core".format(
+                  p50_ms=result["p50"] * 1000, p99_ms=result["p99"] * 1000, **result))
+        return
+
+    async def serve():
+        s = await server(args.max_sessions, args.idle_timeout, args.max_rows, args.max_columns).serve(
+            args.host, args.port)
+        print("serving on " + ", ".join(str(sock.getsockname()) for sock in s.sockets))
+        async with s:
+            await s.serve_forever()
+    asyncio.run(serve())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import concurrent.futures
+import os
+import random
+import time
+
+from minesweeper import DisplayState, GameStatus, Move, arrayboard, engine
+from solver import solver
+
+
+def solver_strategy(b: arrayboard, rng: random.Random):
+    ''' plays the certain moves deduced by the solver, and opens the cell least likely to be mined when there are none.
+    Returns the number of moves and guesses played.
+    '''
+    s = solver(b)
+    e = engine(b)
+    moves = guesses = 0
+    while b.status() == GameStatus.in_progress:
+        batch = s.moves()
+        if not batch:
+            row, col = s.guess()
+            batch = [(row, col, Move.open)]
+            guesses += 1
+        _, changed = e.apply_moves(batch)
+        moves += len(batch)
+        s.observe(changed)
+    return moves, guesses
+
+
+def random_strategy(b: arrayboard, rng: random.Random):
+    ''' opens a random closed cell until the game ends, flagging the last cells once all other cells are opened.
+    Returns the number of moves and guesses played; every move is a guess.
+    '''
+    e = engine(b)
+    moves = 0
+    closed = [(i, j) for i in range(b.rows()) for j in range(b.columns())]
+    while b.status() == GameStatus.in_progress:
+        closed = [cell for cell in closed if b._get_display_state(
+            *cell) == DisplayState.closed]
+        move = Move.flag if len(closed) <= b._flags else Move.open
+        e.apply_moves([closed.pop(rng.randrange(len(closed))) + (move,)])
+        moves += 1
+    return moves, moves
+
+
+STRATEGIES = {
+    "solver": solver_strategy,
+    "random": random_strategy,
+}
+
+
+def _play_chunk(seed: int, games: int, rows: int, columns: int, mines: int, strategy):
+    ''' plays a chunk of games with its own seeded random generator and returns their totals '''
+    rng = random.Random(seed)
+    totals = _totals()
+    for _ in range(games):
+        start = time.perf_counter()
+        b = arrayboard(rows, columns, mines, rng)
+        moves, guesses = strategy(b, rng)
+        totals["seconds"] += time.perf_counter() - start
+        totals["games"] += 1
+        totals["wins"] += b.status() == GameStatus.won
+        totals["moves"] += moves
+        totals["guesses"] += guesses
+    return totals
+
+
+def _totals():
+    return {"games": 0, "wins": 0, "moves": 0, "guesses": 0, "seconds": 0.0}
+
+
+def _summary(totals: dict):
+    ''' returns the aggregate statistics of the games played so far '''
+    games = max(totals["games"], 1)
+    return {
+        "games": totals["games"],
+        "wins": totals["wins"],
+        "win_rate": totals["wins"] / games,
+        "moves_per_game": totals["moves"] / games,
+        "guesses_per_game": totals["guesses"] / games,
+        "seconds_per_game": totals["seconds"] / games,
+    }
+
+
+def simulate(games: int, rows: int, columns: int, mines: int, strategy=solver_strategy, workers: int = None,
+             seed: int = 0, chunk: int = 100):
+    ''' plays the specified number of games with the strategy, and yields the aggregate statistics every time a
+    chunk of games completes. The strategy is a picklable callable that plays a game on a board, given a random
+    generator, and returns the number of moves and guesses it played.
+    '''
+    workers = workers or os.cpu_count()
+    chunks = [(index, min(chunk, games - start))
+              for index, start in enumerate(range(0, games, chunk))]
+    totals = _totals()
+
+    def merge(chunk_totals: dict):
+        for key, value in chunk_totals.items():
+            totals[key] += value
+        return _summary(totals)
+
+    # each chunk is seeded from the seed and its index, so the results do not depend on the number of workers
+    if workers == 1:
+        for index, size in chunks:
+            yield merge(_play_chunk((seed << 32) + index, size, rows, columns, mines, strategy))
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        chunks = iter(chunks)
+        for index, size in chunks:
+            pending.add(pool.submit(_play_chunk, (seed << 32) + index,
+                                    size, rows, columns, mines, strategy))
+            # only a couple of chunks per worker are in flight, so memory does not grow with the number of games
+            if len(pending) < 2 * workers:
+                continue
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield merge(future.result())
+        for future in concurrent.futures.as_completed(pending):
+            yield merge(future.result())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="play many games with a strategy and report win-rate statistics")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--columns", type=int, default=24)
+    parser.add_argument("--mines", type=int, default=100)
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="solver")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk", type=int, default=100)
+    args = parser.parse_args()
+
+    for summary in simulate(args.games, args.rows, args.columns, args.mines, STRATEGIES[args.strategy],
+                            args.workers, args.seed, args.chunk):
+        print("{games} games, win rate {win_rate:.4f}, {moves_per_game:.1f} moves/game, "
+              "{guesses_per_game:.2f} guesses/game, {seconds_per_game:.4f} s/game".format(**summary))
+
+
+if __name__ == '__main__':
+    main()
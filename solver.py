@@ -0,0 +1,440 @@
+import collections
+import functools
+
+from minesweeper import DisplayState, GameState, GameStatus, Move, _mix, board, engine
+
+
+class transpositions(object):
+    ''' transpositions is a bounded table of solver verdicts keyed by 64-bit Zobrist hashes, to be shared by solvers
+    across moves, undos and games. Once the table is full, the least recently used verdict is dropped.
+    '''
+
+    def __init__(self, capacity: int = 65536):
+        self._capacity = capacity
+        self._entries = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: int):
+        ''' returns the verdict stored for the key, or None '''
+        value = self._entries.get(key)
+        if value is None:
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def put(self, key: int, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def stats(self):
+        ''' returns the number of verdicts stored and the capacity, the hits, misses and evictions so far, and the
+        share of lookups that were hits
+        '''
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "capacity": self._capacity,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
+
+
+class solver(object):
+    ''' solver deduces cells of a board that are certainly safe or certainly mined, using only what is visible on
+    the board: display states of cells and the numbers on opened cells. Flagged cells are taken to be mined.
+    It applies two rules to the constraint of every opened numbered cell, i.e. its closed adjoining cells and
+    the number of mines among them:
+    - single cell: if no mines remain all closed cells are safe, and if as many mines remain as closed cells
+      all of them are mined
+    - subset: if the closed cells of one constraint are a subset of another's, the remaining cells of the
+      other hold the difference of their mines
+    Deduction is incremental; only constraints around cells that changed since the last move are re-examined, when
+    the changed cells are observed. Moves that were not observed are caught up with from the board's frontier.
+    With a transpositions table, the probabilities of every position and the arrangements of every pattern of
+    constraints are looked up before they are computed, and stored after.
+    '''
+
+    def __init__(self, board: board, table: transpositions = None):
+        self.board = board
+        self._table = table
+        self._safe = set()  # cells deduced safe that are not opened yet
+        self._mined = set()  # cells deduced mined
+        self._constraints = {}  # opened numbered cell -> (closed cells, remaining mines)
+        self._components = {}  # frozenset of component constraints -> mine counts of its arrangements
+        self._dirty = set()  # opened numbered cells whose constraint must be re-examined
+        self._synced = None  # the hash of the board the solver is up to date with, if any
+
+    def _adjoining(self, row: int, col: int, distance: int = 1):
+        ''' returns the cells within the distance of the cell, in steps between adjoining cells of the board,
+        excluding the cell itself
+        '''
+        cells = self.board._adjoining(row, col)
+        if distance == 1:
+            return cells
+        within = set(cells)
+        for _ in range(distance - 1):
+            within.update(*(self.board._adjoining(*cell) for cell in cells))
+            cells = list(within)
+        within.discard((row, col))
+        return sorted(within)
+
+    def _is_numbered(self, row: int, col: int):
+        ''' checks if the cell is opened and shows the number of its adjoining mines, clear cells showing none '''
+        return self.board._is_numbered(row, col)
+
+    def observe(self, changed):
+        ''' marks the constraints around the changed cells for re-examination '''
+        closed = False
+        for row, col in changed:
+            display_state = self.board._get_display_state(row, col)
+            if display_state == DisplayState.opened:
+                self._safe.discard((row, col))
+            closed = closed or display_state == DisplayState.closed
+            for cell in self._adjoining(row, col) + [(row, col)]:
+                if self._is_numbered(*cell):
+                    self._dirty.add(cell)
+        # cells closed again can take back what was deduced, so the solver then catches up from scratch
+        if self._synced is not None:
+            self._synced = None if closed else self.board.zobrist()
+
+    def _sync(self):
+        ''' brings the solver up to date with the board, from its frontier unless every move since was observed '''
+        h = self.board.zobrist()
+        if h == self._synced:
+            return
+        self._safe, self._mined, self._constraints = set(), set(), {}
+        self._dirty = set(self.board.constraints())
+        self._synced = h
+
+    def _constraint(self, row: int, col: int):
+        ''' returns the closed cells adjoining an opened numbered cell that are not known yet, and the number of
+        mines among them
+        '''
+        unknown = []
+        remaining = self.board._get_game_state(row, col)
+        if remaining == GameState.clear:
+            remaining = 0
+        for cell in self._adjoining(row, col):
+            display_state = self.board._get_display_state(*cell)
+            if display_state == DisplayState.opened or cell in self._safe:
+                continue
+            if display_state == DisplayState.flagged or cell in self._mined:
+                remaining -= 1
+            else:
+                unknown.append(cell)
+        return frozenset(unknown), remaining
+
+    def _deduce(self):
+        ''' applies the single cell rule to the dirty constraints, then the subset rule to the constraints left
+        undecided, until nothing more can be deduced
+        '''
+        self._sync()
+        undecided = set()
+        while self._dirty:
+            while self._dirty:
+                found = set()
+                dirty, self._dirty = self._dirty, set()
+                for cell in dirty:
+                    unknown, remaining = self._constraint(*cell)
+                    self._constraints.pop(cell, None)
+                    undecided.discard(cell)
+                    if not unknown:
+                        continue
+                    if remaining == 0:
+                        found |= self._mark(unknown, self._safe)
+                    elif remaining == len(unknown):
+                        found |= self._mark(unknown, self._mined)
+                    else:
+                        self._constraints[cell] = (unknown, remaining)
+                        undecided.add(cell)
+                self._touch(found)
+
+            found = set()
+            for cell in undecided:
+                for other in self._adjoining(*cell, distance=2):
+                    if cell not in self._constraints or other not in self._constraints:
+                        continue
+                    unknown, remaining = self._constraints[cell]
+                    other_unknown, other_remaining = self._constraints[other]
+                    if not unknown < other_unknown:
+                        unknown, remaining, other_unknown, other_remaining = \
+                            other_unknown, other_remaining, unknown, remaining
+                        if not unknown < other_unknown:
+                            continue
+                    difference = other_unknown - unknown
+                    if other_remaining == remaining:
+                        found |= self._mark(difference, self._safe)
+                    elif other_remaining - remaining == len(difference):
+                        found |= self._mark(difference, self._mined)
+            undecided = set()
+            self._touch(found)
+
+    def _mark(self, cells: frozenset, known: set):
+        ''' adds the cells to the known safe or mined cells and returns the ones that were not known yet '''
+        new = cells - known
+        known |= new
+        return new
+
+    def _touch(self, found: set):
+        ''' marks the constraints adjoining newly deduced cells for re-examination '''
+        for cell in found:
+            for adjoining in self._adjoining(*cell):
+                if self._is_numbered(*adjoining):
+                    self._dirty.add(adjoining)
+
+    def moves(self):
+        ''' returns the list of certain (row, col, move) tuples, usable with board.try_move:
+        - Move.open for every cell deduced safe
+        - Move.flag for every cell deduced mined that is not flagged yet
+        '''
+        self._deduce()
+        closed = [cell for cell in sorted(self._safe | self._mined)
+                  if self.board._get_display_state(*cell) == DisplayState.closed]
+        return [(row, col, Move.open if (row, col) in self._safe else Move.flag) for row, col in closed]
+
+    def solve(self):
+        ''' plays all the certain moves, and the ones they lead to, until no certain move is left.
+        Returns the number of moves played.
+        '''
+        e = engine(self.board)
+        played = 0
+        moves = self.moves()
+        while moves and self.board.status() == GameStatus.in_progress:
+            _, changed = e.apply_moves(moves)
+            if not changed:
+                break
+            played += len(moves)
+            self.observe(changed)
+            moves = self.moves()
+        return played
+
+    def probabilities(self):
+        ''' returns the exact probability of being mined for the closed cells that are not known yet, given the visible
+        numbers and the number of mines left. Returns a dict of the probability of every frontier cell, i.e. a closed
+        cell adjoining an opened number, and the probability shared by all other closed cells.
+        '''
+        if self._table is not None:
+            # the probabilities are stored for the visible state, so they must be computed from all of it
+            self._sync()
+            b = self.board
+            # the same visible state means the same probabilities on boards of the same shape and mines
+            key = b.zobrist() ^ _mix((((b.rows() << 24 | b.columns()) << 32 | b.mines()) << 2) | b._topology.value)
+            cached = self._table.get(key)
+            if cached is None:
+                cached = self._probabilities()
+                self._table.put(key, cached)
+            return dict(cached[0]), cached[1]
+        return self._probabilities()
+
+    def _probabilities(self):
+        self._deduce()
+        # the arrangements of each independent component are cached, so only components changed are enumerated again
+        components = self._split_components()
+        counts = []
+        for component in components:
+            if component not in self._components:
+                self._components[component] = self._arrangements(component)
+            counts.append(self._components[component])
+        self._components = dict(zip(components, counts))
+
+        known_mined = sum(1 for cell in self._mined
+                          if self.board._get_display_state(*cell) == DisplayState.closed)
+        known_safe = sum(1 for cell in self._safe
+                         if self.board._get_display_state(*cell) == DisplayState.closed)
+        frontier = sum(len(cells) for _, cells in counts)
+        # every flag placed covers a mine, so the mines left to place are the remaining flags
+        mines = self.board._flags - known_mined
+        others = self.board._closed - frontier - known_safe - known_mined
+
+        def weight(totals):
+            ''' returns, for every number of frontier mines, its arrangements weighted by the arrangements of the
+            remaining mines among the other cells
+            '''
+            return {k: count * _binomial(others, mines - k) for k, count in totals.items()}
+
+        totals = _convolve([arrangements for arrangements, _ in counts])
+        weights = weight(totals)
+        total = sum(weights.values())
+        if total == 0:
+            return {}, 0.0
+
+        probabilities = {}
+        for i, (arrangements, cells) in enumerate(counts):
+            rest = _convolve([a for j, (a, _) in enumerate(counts) if j != i])
+            for cell, mined in cells.items():
+                weighted = 0
+                for k, count in mined.items():
+                    for r, rest_count in rest.items():
+                        weighted += count * rest_count * \
+                            _binomial(others, mines - k - r)
+                probabilities[cell] = weighted / total
+        others_probability = 0.0
+        if others > 0:
+            others_probability = sum(weights[k] * (mines - k) for k in weights) / (total * others)
+        return probabilities, others_probability
+
+    def _arrangements(self, component: frozenset):
+        ''' counts the arrangements of a component, or looks them up by the pattern of its constraints: patterns are
+        hashed relative to their first cell, so the same pattern is only counted once anywhere on any board
+        '''
+        if self._table is None:
+            return _count_arrangements(component)
+        anchor_row, anchor_col = min(cell for unknown, _ in component for cell in unknown)
+        key = _pattern_hash(component, anchor_row, anchor_col)
+        cached = self._table.get(key)
+        if cached is None:
+            arrangements, cells = _count_arrangements(component)
+            cached = arrangements, {(row - anchor_row, col - anchor_col): mined
+                                    for (row, col), mined in cells.items()}
+            self._table.put(key, cached)
+        arrangements, cells = cached
+        return arrangements, {(row + anchor_row, col + anchor_col): mined for (row, col), mined in cells.items()}
+
+    def guess(self):
+        ''' returns the closed cell least likely to be mined, or None if no cell is left to guess '''
+        probabilities, others_probability = self.probabilities()
+        best = min(probabilities, key=lambda cell: (probabilities[cell], cell), default=None)
+        if best is not None and probabilities[best] <= others_probability:
+            return best
+        # cells deduced safe or mined are on the frontier too
+        return self.board._closed_off_frontier() or best
+
+    def hint(self):
+        ''' returns a hint for the next move as a (row, col, probability) tuple: a closed cell deduced safe with a
+        probability of 0.0, or else the closed cell least likely to be mined with its probability of being mined.
+        Returns None if every closed cell left is known to be mined.
+        '''
+        self._deduce()
+        safe = [cell for cell in self._safe if self.board._get_display_state(*cell) == DisplayState.closed]
+        if safe:
+            return min(safe) + (0.0,)
+        probabilities, others_probability = self.probabilities()
+        best = min(probabilities, key=lambda cell: (probabilities[cell], cell), default=None)
+        if best is not None and probabilities[best] <= others_probability:
+            return best + (probabilities[best],)
+        other = self.board._closed_off_frontier()
+        if other is not None:
+            return other + (others_probability,)
+        if best is not None:
+            return best + (probabilities[best],)
+        return None
+
+    def _split_components(self):
+        ''' returns the undecided constraints grouped into components of constraints that share closed cells '''
+        owners = {}  # closed cell -> constraints over it
+        for cell, (unknown, _) in self._constraints.items():
+            for closed in unknown:
+                owners.setdefault(closed, []).append(cell)
+        components = []
+        seen = set()
+        for cell in self._constraints:
+            if cell in seen:
+                continue
+            seen.add(cell)
+            stack = [cell]
+            component = []
+            while stack:
+                current = stack.pop()
+                component.append(self._constraints[current])
+                for closed in self._constraints[current][0]:
+                    for other in owners[closed]:
+                        if other not in seen:
+                            seen.add(other)
+                            stack.append(other)
+            components.append(frozenset(component))
+        return components
+
+
+@functools.lru_cache(maxsize=None)
+def _binomial(n: int, k: int):
+    ''' returns the number of ways to choose k of n cells '''
+    if k < 0 or k > n:
+        return 0
+    # math.comb needs Python 3.8. Every partial product is itself a binomial coefficient, so each division is exact
+    k = min(k, n - k)
+    count = 1
+    for i in range(1, k + 1):
+        count = count * (n - k + i) // i
+    return count
+
+
+def _convolve(distributions: list):
+    ''' combines independent distributions of arrangement counts per number of mines '''
+    combined = {0: 1}
+    for distribution in distributions:
+        result = {}
+        for k, count in combined.items():
+            for other_k, other_count in distribution.items():
+                result[k + other_k] = result.get(k + other_k, 0) + count * other_count
+        combined = result
+    return combined
+
+
+def _pattern_hash(component: frozenset, anchor_row: int, anchor_col: int):
+    ''' returns a 64-bit hash of the constraints of a component, with cells taken relative to an anchor cell '''
+    h = 0
+    for unknown, remaining in component:
+        cells = 0
+        for row, col in unknown:
+            cells ^= _mix((row - anchor_row) << 32 | (col - anchor_col) & 0xFFFFFFFF)
+        h ^= _mix(cells + remaining)
+    return _mix(h)
+
+
+def _count_arrangements(component: frozenset):
+    ''' enumerates the mine arrangements of the closed cells of a component that satisfy all its constraints.
+    Returns the number of arrangements per number of mines, and for every cell the number of arrangements per
+    number of mines in which the cell is mined.
+    '''
+    constraints = list(component)
+    owners = {}
+    for index, (unknown, _) in enumerate(constraints):
+        for cell in unknown:
+            owners.setdefault(cell, []).append(index)
+    # visit cells constraint by constraint, so that constraints are completed, and pruned, early
+    cells, seen = [], set()
+    for unknown, _ in constraints:
+        new = sorted(unknown - seen)
+        cells += new
+        seen.update(new)
+    cell_constraints = [owners[cell] for cell in cells]
+    needed = [remaining for _, remaining in constraints]
+    unassigned = [len(unknown) for unknown, _ in constraints]
+
+    arrangements = {}
+    mined_arrangements = [{} for _ in cells]
+    mined = []
+
+    def assign(index: int):
+        if index == len(cells):
+            k = len(mined)
+            arrangements[k] = arrangements.get(k, 0) + 1
+            for cell in mined:
+                mined_arrangements[cell][k] = mined_arrangements[cell].get(k, 0) + 1
+            return
+        for value in (0, 1):
+            if any(needed[c] < value or needed[c] - value > unassigned[c] - 1 for c in cell_constraints[index]):
+                continue
+            for c in cell_constraints[index]:
+                needed[c] -= value
+                unassigned[c] -= 1
+            if value:
+                mined.append(index)
+            assign(index + 1)
+            if value:
+                mined.pop()
+            for c in cell_constraints[index]:
+                needed[c] += value
+                unassigned[c] += 1
+
+    assign(0)
+    return arrangements, dict(zip(cells, mined_arrangements))
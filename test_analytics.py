@@ -0,0 +1,69 @@
+import concurrent.futures
+import unittest
+import analytics
+import minesweeper
+
+
+class TestAnalytics(unittest.TestCase):
+    def test_analyze(self):
+        tests = {
+            "no-mines": {
+                "rows": 4,
+                "columns": 5,
+                "mine_cells": [],
+                "metrics": {"openings": 1, "largest_region": 20, "isolated": 0, "3bv": 1},
+            },
+            "wall": {
+                # a column of mines splits the board into two openings
+                "rows": 3,
+                "columns": 7,
+                "mine_cells": [(0, 3), (1, 3), (2, 3)],
+                "metrics": {"openings": 2, "largest_region": 6, "isolated": 0, "3bv": 2},
+            },
+            "single-cell-openings": {
+                # the corners and the middle are clear, and every numbered cell adjoins one of them
+                "rows": 5,
+                "columns": 5,
+                "mine_cells": [(0, 2), (2, 0), (2, 4), (4, 2)],
+                "metrics": {"openings": 5, "largest_region": 1, "isolated": 0, "3bv": 5},
+            },
+            "all-numbered": {
+                "rows": 2,
+                "columns": 3,
+                "mine_cells": [(0, 1)],
+                "metrics": {"openings": 0, "largest_region": 0, "isolated": 5, "3bv": 5},
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                b = minesweeper.arrayboard.from_mines(test["rows"], test["columns"], test["mine_cells"])
+                self.assertEqual(analytics.analyze(b), test["metrics"])
+
+    def test_label(self):
+        # every region is what a flood fill from any of its cells opens
+        for topology in minesweeper.Topology:
+            with self.subTest(topology=topology.name):
+                b = minesweeper.arrayboard(15, 16, 45, seed=1, topology=topology)
+                labels, sizes = analytics.label(b)
+                self.assertEqual(len(labels), 15 * 16)
+                for region, size in enumerate(sizes, 1):
+                    k = labels.index(region)
+                    row, col = divmod(k, 16)
+                    b._set_display_state(row, col, minesweeper.DisplayState.opened)
+                    opened = [(row, col)] + b._open_adjoining_clear(row, col)
+                    clear = [cell for cell in opened if b._get_game_state(*cell) == minesweeper.GameState.clear]
+                    self.assertEqual(sorted(clear), [divmod(k, 16) for k in range(15 * 16) if labels[k] == region])
+                    self.assertEqual(len(clear), size)
+                self.assertEqual(sum(sizes), sum(b._get_game_state(*divmod(k, 16)) == minesweeper.GameState.clear
+                                                 for k in range(15 * 16)))
+
+    def test_score(self):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            scores = list(analytics.score(8, 10, 10, range(50), executor=executor, chunksize=2))
+        self.assertEqual([seed for seed, _ in scores], list(range(50)))
+        for seed, metrics in scores[:5]:
+            self.assertEqual(metrics, analytics.analyze(minesweeper.arrayboard(8, 10, 10, seed)))
+
+
+if __name__ == "__main__":
+    unittest.main()
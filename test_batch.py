@@ -0,0 +1,63 @@
+import random
+import unittest
+import batch
+import minesweeper
+
+
+class TestBatch(unittest.TestCase):
+    def test_init(self):
+        tests = {
+            "easy": {
+                "shape": (8, 10, 10),
+            },
+            "single-row": {
+                "shape": (1, 7, 3),
+            },
+            "full": {
+                "shape": (3, 3, 9),
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                rows, columns, mines = test["shape"]
+                b = batch.batch(50, rows, columns, mines, seed=1)
+                layouts = [b._state_bytes(i)[0] for i in range(50)]
+                for mined in layouts:
+                    self.assertEqual(sum(mined), mines)
+                self.assertEqual(layouts, [batch.batch(50, rows, columns, mines, seed=1)._state_bytes(i)[0]
+                                           for i in range(50)])
+                self.assertEqual(b.statuses(), bytearray(50))
+                self.assertEqual(b.flags(), [mines] * 50)
+        self.assertRaises(minesweeper.InvalidInputError, batch.batch, 10, 3, 3, 10)
+
+    def test_play(self):
+        # every board plays as an arrayboard with the same mines, moved by an engine
+        b = batch.batch(100, 8, 10, 10, seed=2)
+        engines = []
+        for i in range(100):
+            mine_cells = [divmod(k, 10) for k, mined in enumerate(b._state_bytes(i)[0]) if mined]
+            a = minesweeper.arrayboard.from_mines(8, 10, mine_cells)
+            engines.append((minesweeper.engine(a), mine_cells))
+
+        rng = random.Random(3)
+        for _ in range(200):
+            moves = []
+            for e, mine_cells in engines:
+                row, col = rng.randrange(-1, 8), rng.randrange(10)
+                if rng.random() < 0.005:
+                    move = rng.choice(list(minesweeper.Move))
+                else:
+                    move = minesweeper.Move.flag if (row, col) in mine_cells else minesweeper.Move.open
+                moves.append((row, col, move))
+            results, statuses = b.play(*zip(*moves))
+            for i, (e, _) in enumerate(engines):
+                self.assertEqual(results[i], e.apply_moves([moves[i]])[0][0])
+                self.assertEqual(statuses[i], e.board.status().value)
+                self.assertEqual(b._state_bytes(i), e.board._state_bytes())
+        statuses = b.statuses()
+        self.assertGreater(statuses.count(minesweeper.GameStatus.won.value), 0)
+        self.assertGreater(statuses.count(minesweeper.GameStatus.lost.value), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+import contextlib
+import io
+import unittest
+import bench_minesweeper
+
+
+class TestBenchMinesweeper(unittest.TestCase):
+    def test_run_suite(self):
+        for name in bench_minesweeper.ENGINES:
+            with self.subTest(engine=name):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results = bench_minesweeper.run_suite(engines=(name,), sizes=((8, 10),), min_time=0)
+                self.assertEqual(len(results), len(bench_minesweeper.BENCHMARKS) *
+                                 len(bench_minesweeper.DENSITIES))
+                for key, result in results.items():
+                    self.assertGreaterEqual(result["ops_per_sec"], 0, key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+import instrument
+import minesweeper
+
+
+class TestInstruments(unittest.TestCase):
+    def _board(self):
+        # a clear region of 3 columns, a column of numbers, and a column of mines
+        return minesweeper.arrayboard.from_mines(4, 5, [(i, 4) for i in range(4)])
+
+    def test_apply(self):
+        tests = {
+            "flood-fill": {
+                "move": (3, 0, minesweeper.Move.open),
+                "record": {"result": "ok", "flood_size": 15, "flood_depth": 3, "cells_touched": 16},
+            },
+            "number": {
+                "move": (0, 3, minesweeper.Move.open),
+                "record": {"result": "ok", "flood_size": None, "flood_depth": None, "cells_touched": 1},
+            },
+            "invalid-cell": {
+                "move": (5, 0, minesweeper.Move.open),
+                "record": {"result": "invalid_cell", "flood_size": None, "cells_touched": 0},
+                "error": minesweeper.InvalidInputError,
+            },
+            "mine": {
+                "move": (0, 4, minesweeper.Move.open),
+                "record": {"result": "mine", "cells_touched": 20},
+                "error": minesweeper.OpenedMine,
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                i = instrument.instruments()
+                b = i.attach(self._board())
+                if "error" in test:
+                    self.assertRaises(test["error"], b.try_move, *test["move"])
+                else:
+                    b.try_move(*test["move"])
+                record = i.recent()[-1]
+                for key, value in test["record"].items():
+                    self.assertEqual(record[key], value, key)
+                self.assertGreaterEqual(record["check_seconds"], 0)
+                snapshot = i.snapshot()
+                self.assertEqual(snapshot["moves"], [
+                    {"move": "open", "result": test["record"]["result"], "count": 1}])
+                self.assertEqual(snapshot["histograms"]["apply_seconds"]["count"], 1)
+                self.assertEqual(snapshot["histograms"]["flood_size"]["count"],
+                                 int(test["record"].get("flood_size") is not None))
+
+    def test_export(self):
+        i = instrument.instruments(profile_every=2)
+        b = i.attach(self._board())
+        for col in range(3):
+            b.try_move(0, col, minesweeper.Move.flag)
+            b.try_move(0, col, minesweeper.Move.clear)
+        self.assertEqual(len(i.recent()), 6)
+        self.assertIsNotNone(i.profile())
+        self.assertEqual(i.snapshot(), json.loads(i.to_json()))
+
+        text = i.to_prometheus()
+        self.assertIn('minesweeper_moves_total{move="flag",result="ok"} 3\n', text)
+        self.assertIn('minesweeper_move_cells_touched_bucket{le="1"} 6\n', text)
+        self.assertIn('minesweeper_move_cells_touched_bucket{le="+Inf"} 6\n', text)
+        self.assertIn("minesweeper_move_cells_touched_count 6\n", text)
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "metrics")
+            i.export(path, prometheus=True)
+            with open(path) as f:
+                self.assertEqual(f.read(), text)
+
+    def test_game_render(self):
+        g = minesweeper.game("e", seed=1, terminal=True)
+        g._renderer._out = io.StringIO()
+        i = instrument.instruments()
+        i.attach(g)
+        g.board.try_move(0, 0, minesweeper.Move.flag)
+        g._show(g.board._last_changed)
+        self.assertIsNotNone(i.recent()[-1]["render_seconds"])
+        self.assertEqual(i.snapshot()["histograms"]["render_seconds"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
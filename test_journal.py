@@ -0,0 +1,83 @@
+import os
+import random
+import tempfile
+import unittest
+import journal
+import minesweeper
+
+
+def _display(b: minesweeper.board):
+    return [b._get_display_state(i, j) for i in range(b.rows()) for j in range(b.columns())]
+
+
+class TestJournal(unittest.TestCase):
+    def _play(self, path: str, engines: list, moves: int, seed: int):
+        ''' plays random moves on interleaved games of a new journal, and returns the boards and the state of every
+        game after each of its moves
+        '''
+        rng = random.Random(seed)
+        states = {}
+        boards = {}
+        with journal.journal(path, batch=5, stride=4) as j:
+            for engine in engines:
+                b = j.new_game(6, 7, 8, rng.getrandbits(64), engine)
+                boards[b._game] = b
+                states[b._game] = [_display(b)]
+            for _ in range(moves):
+                game = rng.choice(list(boards))
+                b = boards[game]
+                try:
+                    b.try_move(rng.randrange(-1, 7), rng.randrange(7), rng.choice(list(minesweeper.Move)))
+                except (minesweeper.InvalidInputError, minesweeper.OpenedMine):
+                    pass
+                states[game].append(_display(b))
+        return boards, states
+
+    def test_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "moves.journal")
+            engines = [minesweeper.board, minesweeper.arrayboard, minesweeper.lazyboard, minesweeper.lazyboard]
+            boards, _ = self._play(path, engines, 200, seed=1)
+            self.assertEqual(os.path.getsize(path) % 16, 0)
+            replayed = dict(journal.replay(path))
+            self.assertEqual(sorted(replayed), sorted(boards))
+            for game, b in boards.items():
+                with self.subTest(game=game):
+                    self.assertIsInstance(replayed[game], type(b))
+                    self.assertEqual(replayed[game]._state_bytes(), b._state_bytes())
+                    self.assertEqual(replayed[game].status(), b.status())
+            self.assertEqual([game for game, _ in journal.replay(path, games={2})], [2])
+
+            # games appended later get new numbers
+            with journal.journal(path) as j:
+                self.assertEqual(j.new_game(2, 2, 1, 5)._game, 5)
+
+    def test_seek_rebuild(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "moves.journal")
+            _, states = self._play(path, [minesweeper.lazyboard, minesweeper.arrayboard], 60, seed=2)
+            slots = {game: [] for game in states}
+            for record in journal.records(path):
+                slots[record[1]].append(record[0])
+            for game, game_states in states.items():
+                for move, state in enumerate(game_states):
+                    with self.subTest(game=game, move=move):
+                        self.assertEqual(journal.seek(path, game, move), slots[game][move])
+                        self.assertEqual(_display(journal.rebuild(path, game, move)), state)
+            self.assertRaises(minesweeper.InvalidInputError, journal.seek, path, 3, 0)
+            self.assertRaises(minesweeper.InvalidInputError, journal.rebuild, path, 1, len(states[1]))
+
+    def test_replay_mismatch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "moves.journal")
+            with journal.journal(path) as j:
+                b = j.new_game(3, 3, 1, 7, minesweeper.arrayboard)
+                b.try_move(0, 0, minesweeper.Move.flag)
+            with open(path, "r+b") as f:
+                f.seek(2 * 16 + 5)
+                f.write(bytes([minesweeper.MoveResult.no_flags.value]))
+            self.assertRaises(minesweeper.InvalidInputError, list, journal.replay(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,8 @@
+import functools
+import io
+import os
+import random
+import tempfile
 import unittest
 import minesweeper
 import re
@@ -54,11 +59,111 @@ class TestBoard(unittest.TestCase):
         }
         for name, test in tests.items():
             with self.subTest(name=name):
-                b = minesweeper.board(0, 0, 0)
-                b._mine_cells = test["mines_cells"]
+                b = minesweeper.board.from_mines(6, 7, test["mines_cells"])
                 self.assertEqual(b._get_adjoining_mines(
                     test["row"], test["col"]), test["count"])
 
+    def test_game_state_grid(self):
+        tests = {
+            "sparse": {
+                "rows": 7,
+                "columns": 9,
+                "mines": 5,
+            },
+            "dense": {
+                "rows": 6,
+                "columns": 4,
+                "mines": 20,
+            },
+            "all-mines": {
+                "rows": 3,
+                "columns": 2,
+                "mines": 6,
+            },
+            "single-row": {
+                "rows": 1,
+                "columns": 12,
+                "mines": 4,
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                b = minesweeper.board(
+                    test["rows"], test["columns"], test["mines"])
+                self.assertEqual(len(set(b._mine_cells)), test["mines"])
+                for i in range(test["rows"]):
+                    for j in range(test["columns"]):
+                        game_state = b.cells[i][j]._game_state
+                        if (i, j) in b._mine_cells:
+                            self.assertEqual(
+                                game_state, minesweeper.GameState.mined)
+                        elif b._get_adjoining_mines(i, j) == 0:
+                            self.assertEqual(
+                                game_state, minesweeper.GameState.clear)
+                        else:
+                            self.assertEqual(
+                                game_state, b._get_adjoining_mines(i, j))
+
+    def test_adjacency(self):
+        tests = {
+            "square-corner": {
+                "topology": minesweeper.Topology.square,
+                "cell": (0, 0),
+                "adjoining": [(0, 1), (1, 0), (1, 1)],
+            },
+            "square-middle": {
+                "topology": minesweeper.Topology.square,
+                "cell": (2, 2),
+                "adjoining": [(1, 1), (1, 2), (1, 3), (2, 1), (2, 3), (3, 1), (3, 2), (3, 3)],
+            },
+            "cross-edge": {
+                "topology": minesweeper.Topology.cross,
+                "cell": (0, 2),
+                "adjoining": [(0, 1), (0, 3), (1, 2)],
+            },
+            "torus-corner": {
+                "topology": minesweeper.Topology.torus,
+                "cell": (0, 0),
+                "adjoining": [(0, 1), (0, 4), (1, 0), (1, 1), (1, 4), (3, 0), (3, 1), (3, 4)],
+            },
+            "hex-even-row": {
+                "topology": minesweeper.Topology.hex,
+                "cell": (2, 2),
+                "adjoining": [(1, 1), (1, 2), (2, 1), (2, 3), (3, 1), (3, 2)],
+            },
+            "hex-odd-row": {
+                "topology": minesweeper.Topology.hex,
+                "cell": (1, 2),
+                "adjoining": [(0, 2), (0, 3), (1, 1), (1, 3), (2, 2), (2, 3)],
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                b = minesweeper.arrayboard(4, 5, 0, topology=test["topology"])
+                self.assertEqual(sorted(b._adjoining(*test["cell"])), test["adjoining"])
+                # the index of a shape matches the adjoining cells computed cell by cell, and is shared
+                offsets, neighbors = minesweeper._adjacency(4, 5, test["topology"])
+                self.assertIs(neighbors, minesweeper._adjacency(4, 5, test["topology"])[1])
+                for k in range(20):
+                    self.assertEqual(list(neighbors[offsets[k]:offsets[k + 1]]),
+                                     minesweeper._neighbors(test["topology"], 4, 5, *divmod(k, 5)))
+                # boards too large to index compute the same adjoining cells
+                unindexed = minesweeper._unindexed_function(4, 5, test["topology"])
+                for k in range(20):
+                    self.assertEqual(list(unindexed(k)), list(neighbors[offsets[k]:offsets[k + 1]]))
+
+    def test_topology_game_state_grid(self):
+        for topology in minesweeper.Topology:
+            with self.subTest(topology=topology.name):
+                b = minesweeper.board(9, 11, 30, seed=4, topology=topology)
+                for i in range(9):
+                    for j in range(11):
+                        if b._get_game_state(i, j) == minesweeper.GameState.mined:
+                            continue
+                        count = sum((cell in b._mine_cells) for cell in b._adjoining(i, j))
+                        self.assertEqual(b._get_game_state(i, j), count or minesweeper.GameState.clear)
+                        self.assertEqual(b._get_adjoining_mines(i, j), count)
+
     def test_check_cell(self):
         tests = {
             "row-out-of-bound": {
@@ -325,16 +430,42 @@ class TestBoard(unittest.TestCase):
                         self.assertEqual(
                             b.cells[i][j]._display_state, test["new_display_states"][i][j], msg="row: {}, col: {}".format(i, j))
 
+    def test_open_adjoining_clear_large_region(self):
+        tests = {
+            "board": {
+                "engine": minesweeper.board,
+            },
+            "arrayboard": {
+                "engine": minesweeper.arrayboard,
+            },
+            "bitboard": {
+                "engine": minesweeper.bitboard,
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                # a region far deeper than the recursion limit
+                b = test["engine"](rows=150, columns=150, mines=0)
+                b._set_display_state(0, 0, minesweeper.DisplayState.opened)
+                opened = b._open_adjoining_clear(row=0, col=0)
+                self.assertEqual(len(opened), 150 * 150 - 1)
+                self.assertEqual(len(set(opened)), len(opened))
+                self.assertNotIn((0, 0), opened)
+                self.assertFalse(any(b._get_display_state(i, j) == minesweeper.DisplayState.closed
+                                     for i in range(150) for j in range(150)))
+
     def test_more_moves_remaining(self):
         def openAllCells(board: minesweeper.board):
             for i in range(board.rows()):
                 for j in range(board.columns()):
                     board.cells[i][j]._display_state = minesweeper.DisplayState.opened
+            board._closed = 0
 
         def openAllCellsAndConsumeAllFlags(board: minesweeper.board):
             for i in range(board.rows()):
                 for j in range(board.columns()):
                     board.cells[i][j]._display_state = minesweeper.DisplayState.opened
+            board._closed = 0
             board._flags = 0
 
         tests = {
@@ -359,6 +490,783 @@ class TestBoard(unittest.TestCase):
                 self.assertEqual(b.more_moves_remaining(), test["moreMoves"])
 
 
+    def test_status(self):
+        def openClear(board: minesweeper.board):
+            for i in range(board.rows()):
+                for j in range(board.columns()):
+                    if (i, j) not in board._mine_cells and board._get_display_state(i, j) == minesweeper.DisplayState.closed:
+                        board.try_move(i, j, minesweeper.Move.open)
+
+        def flagMines(board: minesweeper.board):
+            for (i, j) in board._mine_cells:
+                board.try_move(i, j, minesweeper.Move.flag)
+
+        def openMine(board: minesweeper.board):
+            i, j = board._mine_cells[0]
+            self.assertRaises(minesweeper.OpenedMine,
+                              board.try_move, i, j, minesweeper.Move.open)
+
+        tests = {
+            "new-board": {
+                "moves": [],
+                "status": minesweeper.GameStatus.in_progress,
+                "closed": 16,
+                "flagged_mines": 0,
+            },
+            "clear-cells-opened": {
+                "moves": [openClear],
+                "status": minesweeper.GameStatus.in_progress,
+                "closed": 3,
+                "flagged_mines": 0,
+            },
+            "mines-flagged": {
+                "moves": [flagMines],
+                "status": minesweeper.GameStatus.in_progress,
+                "closed": 13,
+                "flagged_mines": 3,
+            },
+            "won": {
+                "moves": [flagMines, openClear],
+                "status": minesweeper.GameStatus.won,
+                "closed": 0,
+                "flagged_mines": 3,
+            },
+            "lost": {
+                "moves": [openMine],
+                "status": minesweeper.GameStatus.lost,
+                "closed": 0,
+                "flagged_mines": 0,
+            },
+        }
+        for name, test in tests.items():
+            for engine in (minesweeper.board, minesweeper.arrayboard):
+                with self.subTest(name=name, engine=engine.__name__):
+                    b = engine(rows=4, columns=4, mines=3)
+                    for move in test["moves"]:
+                        move(b)
+                    self.assertEqual(b.status(), test["status"])
+                    self.assertEqual(b._closed, test["closed"])
+                    self.assertEqual(b._flagged_mines, test["flagged_mines"])
+                    self.assertEqual(b._closed, sum(b._get_display_state(i, j) == minesweeper.DisplayState.closed
+                                                    for i in range(4) for j in range(4)))
+
+class TestArrayBoard(unittest.TestCase):
+    def _boards(self, rows: int, columns: int, mines: int, seed: int):
+        b = minesweeper.board(rows, columns, mines, seed)
+        a = minesweeper.arrayboard(rows, columns, mines, seed)
+        return b, a
+
+    def test_init(self):
+        tests = {
+            "regular-case": {
+                "rows": 10,
+                "columns": 5,
+                "mines": 12,
+            },
+            "no-mines": {
+                "rows": 1,
+                "columns": 5,
+                "mines": 0,
+            },
+            "all-mines": {
+                "rows": 3,
+                "columns": 3,
+                "mines": 9,
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                b, a = self._boards(
+                    test["rows"], test["columns"], test["mines"], seed=1)
+                self.assertEqual(a._mine_cells, b._mine_cells)
+                self.assertEqual(len(a._game_states),
+                                 test["rows"] * test["columns"])
+                for i in range(test["rows"]):
+                    for j in range(test["columns"]):
+                        self.assertEqual(a._get_game_state(
+                            i, j), b.cells[i][j]._game_state)
+                        self.assertEqual(a._get_display_state(
+                            i, j), minesweeper.DisplayState.closed)
+
+    def test_try_move(self):
+        tests = {
+            "flag-and-clear": {
+                "moves": [(0, 0, minesweeper.Move.flag), (0, 0, minesweeper.Move.clear)],
+            },
+            "open-all": {
+                "moves": [(i, j, minesweeper.Move.open) for i in range(8) for j in range(10)],
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                b, a = self._boards(8, 10, 10, seed=2)
+                for row, col, move in test["moves"]:
+                    outcomes = []
+                    for brd in (b, a):
+                        try:
+                            brd.try_move(row, col, move)
+                            outcomes.append(None)
+                        except (minesweeper.InvalidInputError, minesweeper.OpenedMine) as e:
+                            outcomes.append((type(e), str(e)))
+                    self.assertEqual(outcomes[0], outcomes[1])
+                    self.assertEqual(a.more_moves_remaining(),
+                                     b.more_moves_remaining())
+                    self.assertEqual(a._flags, b._flags)
+                for i in range(8):
+                    for j in range(10):
+                        self.assertEqual(a._get_display_state(
+                            i, j), b.cells[i][j]._display_state)
+                        self.assertEqual(a._cell_str(i, j), str(b.cells[i][j]))
+
+
+class TestLazyBoard(unittest.TestCase):
+    def test_first_open(self):
+        tests = {
+            "corner": {
+                "rows": 8,
+                "columns": 10,
+                "mines": 70,
+                "cell": (0, 0),
+                "safe": [(0, 0), (0, 1), (1, 0), (1, 1)],
+            },
+            "middle": {
+                "rows": 8,
+                "columns": 10,
+                "mines": 71,
+                "cell": (4, 5),
+                "safe": [(i, j) for i in range(3, 6) for j in range(4, 7)],
+            },
+            "no-room-around": {
+                "rows": 3,
+                "columns": 3,
+                "mines": 8,
+                "cell": (1, 1),
+                "safe": [(1, 1)],
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                rows, columns = test["rows"], test["columns"]
+                b = minesweeper.lazyboard(rows, columns, test["mines"], seed=8)
+                b.try_move(0, 1 if test["cell"] != (0, 1) else 0, minesweeper.Move.flag)
+                b.try_move(*test["cell"], minesweeper.Move.open)
+                self.assertEqual(len(set(b._mine_cells)), test["mines"])
+                self.assertFalse(set(b._mine_cells) & set(test["safe"]))
+                self.assertEqual(b._flagged_mines, int((0, 1) in b._mine_cells))
+                self.assertEqual(b.status(), minesweeper.GameStatus.in_progress)
+                # counts are only taken for the cells read so far, and match the ones of a fully counted grid
+                grid = minesweeper._game_state_grid(rows, columns, b._mine_cells)
+                self.assertLess(b._game_states.count(0), rows * columns - test["mines"])
+                for i in range(rows):
+                    for j in range(columns):
+                        value = grid[i * columns + j]
+                        self.assertEqual(b._get_game_state(i, j), minesweeper._GAME_STATES[
+                            (value if value != 0xFF else -1) + 1])
+                self.assertEqual(b._game_states.count(0), 0)
+
+    def test_try_move(self):
+        # once the mines are placed, the game plays as on an arrayboard with the same mines
+        b = minesweeper.lazyboard(16, 30, 99, seed=9)
+        b.try_move(8, 15, minesweeper.Move.open)
+        a = minesweeper.arrayboard.from_mines(16, 30, b._mine_cells)
+        a.try_move(8, 15, minesweeper.Move.open)
+        moves = [(i, j, minesweeper.Move.flag if (i, j) in b._mine_cells else minesweeper.Move.open)
+                 for i in range(16) for j in range(30)]
+        random.Random(10).shuffle(moves)
+        for row, col, move in moves:
+            outcomes = []
+            for brd in (a, b):
+                try:
+                    brd.try_move(row, col, move)
+                    outcomes.append(None)
+                except minesweeper.InvalidInputError as e:
+                    outcomes.append(str(e))
+            self.assertEqual(outcomes[0], outcomes[1])
+            self.assertEqual(b.status(), a.status())
+        self.assertEqual(b.status(), minesweeper.GameStatus.won)
+        for i in range(16):
+            for j in range(30):
+                self.assertEqual(b._cell_str(i, j), a._cell_str(i, j))
+
+    def test_before_placement(self):
+        # reading a cell before the mines are placed keeps no count, and a board cannot be saved before it
+        b = minesweeper.lazyboard(8, 10, 40, seed=2)
+        self.assertEqual(b._get_adjoining_mines(0, 0), 0)
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertRaises(minesweeper.InvalidInputError, b.save, os.path.join(directory, "board"))
+        b.try_move(7, 9, minesweeper.Move.open)
+        self.assertEqual(b._get_adjoining_mines(0, 0), sum(cell in b._mine_cells for cell in b._adjoining(0, 0)))
+
+
+class TestBitBoard(unittest.TestCase):
+    def _mine_cells(self, b: minesweeper.bitboard):
+        mined = b._cell_bytes(b._mined)
+        return [divmod(k, b.columns()) for k in range(len(mined)) if mined[k]]
+
+    def test_init(self):
+        tests = {
+            "easy": {
+                "rows": 8,
+                "columns": 10,
+                "mines": 10,
+            },
+            "dense": {
+                "rows": 13,
+                "columns": 7,
+                "mines": 80,
+            },
+            "full": {
+                "rows": 3,
+                "columns": 4,
+                "mines": 12,
+            },
+            "no-mines": {
+                "rows": 5,
+                "columns": 1,
+                "mines": 0,
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                rows, columns = test["rows"], test["columns"]
+                b = minesweeper.bitboard(rows, columns, test["mines"], seed=11)
+                mine_cells = self._mine_cells(b)
+                self.assertEqual(len(mine_cells), test["mines"])
+                self.assertEqual(mine_cells, self._mine_cells(
+                    minesweeper.bitboard(rows, columns, test["mines"], seed=11)))
+                grid = minesweeper._game_state_grid(rows, columns, mine_cells)
+                for i in range(rows):
+                    for j in range(columns):
+                        value = grid[i * columns + j]
+                        self.assertEqual(b._get_game_state(i, j), minesweeper._GAME_STATES[
+                            (value if value != 0xFF else -1) + 1])
+                        if value != 0xFF:
+                            self.assertEqual(b._get_adjoining_mines(i, j), value)
+                        self.assertEqual(b._get_display_state(i, j), minesweeper.DisplayState.closed)
+
+    def test_try_move(self):
+        # the game plays as on an arrayboard with the same mines, including saving and undoing moves
+        b = minesweeper.bitboard(16, 30, 60, seed=12)
+        mine_cells = self._mine_cells(b)
+        a = minesweeper.arrayboard.from_mines(16, 30, mine_cells)
+        a.snapshot(), b.snapshot()
+        moves = [(i, j, minesweeper.Move.flag if (i, j) in mine_cells else minesweeper.Move.open)
+                 for i in range(16) for j in range(30)]
+        random.Random(13).shuffle(moves)
+        for number, (row, col, move) in enumerate(moves):
+            outcomes = []
+            for brd in (a, b):
+                try:
+                    brd.try_move(row, col, move)
+                    outcomes.append(None)
+                except minesweeper.InvalidInputError as e:
+                    outcomes.append(str(e))
+            self.assertEqual(outcomes[0], outcomes[1])
+            self.assertEqual(b.status(), a.status())
+            if number == len(moves) // 2:
+                self.assertEqual(b._state_bytes(), a._state_bytes())
+                self.assertEqual(sorted(b.undo(3)), sorted(a.undo(3)))
+        self.assertEqual(b._state_bytes(), a._state_bytes())
+        for i in range(16):
+            for j in range(30):
+                self.assertEqual(b._cell_str(i, j), a._cell_str(i, j))
+
+        # opening a mine reveals the board, and undoing it closes the board again
+        b = minesweeper.bitboard(8, 10, 10, seed=14)
+        b.snapshot()
+        row, col = self._mine_cells(b)[0]
+        with self.assertRaises(minesweeper.OpenedMine):
+            b.try_move(row, col, minesweeper.Move.open)
+        self.assertEqual(b._state_bytes()[1], bytes([minesweeper.DisplayState.opened.value]) * 80)
+        b.undo()
+        self.assertEqual(b._state_bytes()[1], bytes(80))
+        self.assertEqual(b.status(), minesweeper.GameStatus.in_progress)
+
+        # the cells a flood or a reveal changes are only made into tuples when they are read
+        b = minesweeper.bitboard(30, 40, 0)
+        b.snapshot()
+        results, changed = minesweeper.engine(b).apply_moves([(5, 7, minesweeper.Move.open)], cells=False)
+        self.assertEqual((results, changed), (bytearray([minesweeper.MoveResult.ok.value]), 1200))
+        self.assertIsInstance(b._log[-1][4], minesweeper._bitcells)
+        cells = b.undo()
+        self.assertEqual(len(cells), 1200)
+        self.assertEqual(cells[0], (5, 7))
+        self.assertEqual(sorted(cells), [(i, j) for i in range(30) for j in range(40)])
+        self.assertEqual(b._state_bytes()[1], bytes(1200))
+
+
+class TestChunkedBoard(unittest.TestCase):
+    def _mine_cells(self, c: minesweeper.chunkedboard):
+        size = c._chunk_size
+        return [cell for i in range((c.rows() + size - 1) // size) for j in range((c.columns() + size - 1) // size)
+                for cell in c._chunk_mines(i, j)]
+
+    def test_init(self):
+        tests = {
+            "whole-chunks": {
+                "rows": 8,
+                "columns": 12,
+                "mines": 20,
+            },
+            "partial-chunks": {
+                "rows": 10,
+                "columns": 7,
+                "mines": 15,
+            },
+            "single-chunk": {
+                "rows": 3,
+                "columns": 3,
+                "mines": 2,
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                c = minesweeper.chunkedboard(
+                    test["rows"], test["columns"], test["mines"], seed=3, chunk_size=4)
+                mine_cells = self._mine_cells(c)
+                self.assertEqual(c.mines(), len(mine_cells))
+                self.assertEqual(len(set(mine_cells)), len(mine_cells))
+                grid = minesweeper._game_state_grid(
+                    test["rows"], test["columns"], mine_cells)
+                for i in range(test["rows"]):
+                    for j in range(test["columns"]):
+                        value = grid[i * test["columns"] + j]
+                        self.assertEqual(c._get_game_state(i, j), minesweeper._GAME_STATES[
+                            (value if value != 0xFF else -1) + 1])
+                        if value != 0xFF:
+                            self.assertEqual(
+                                c._get_adjoining_mines(i, j), value)
+
+    def test_try_move(self):
+        # a cache of two chunks spills and reloads display states all the time, which must not change the game
+        with tempfile.TemporaryDirectory() as spill_dir:
+            c = minesweeper.chunkedboard(
+                12, 12, 20, seed=4, chunk_size=4, cache_chunks=2, spill_dir=spill_dir)
+            mine_cells = self._mine_cells(c)
+            a = minesweeper.arrayboard.from_mines(12, 12, mine_cells)
+            moves = [(i, j, minesweeper.Move.flag if (i, j) in mine_cells else minesweeper.Move.open)
+                     for i in range(12) for j in range(12)]
+            random.Random(5).shuffle(moves)
+            for row, col, move in moves:
+                outcomes = []
+                for brd in (a, c):
+                    try:
+                        brd.try_move(row, col, move)
+                        outcomes.append(None)
+                    except minesweeper.InvalidInputError as e:
+                        outcomes.append(str(e))
+                self.assertEqual(outcomes[0], outcomes[1])
+                self.assertEqual(c.status(), a.status())
+            self.assertEqual(c.status(), minesweeper.GameStatus.won)
+            for i in range(12):
+                for j in range(12):
+                    self.assertEqual(c._cell_str(i, j), a._cell_str(i, j))
+
+    def test_seed(self):
+        c1 = minesweeper.chunkedboard(100, 100, 1500, seed=6, chunk_size=16)
+        c2 = minesweeper.chunkedboard(100, 100, 1500, seed=6, chunk_size=16)
+        self.assertEqual(self._mine_cells(c1), self._mine_cells(c2))
+
+    def test_huge_board(self):
+        c = minesweeper.chunkedboard(10 ** 6, 10 ** 6, 10 ** 11, seed=7)
+        # every chunk holds its rounded share of the mines
+        self.assertAlmostEqual(c.mines() / 10 ** 11, 1, places=2)
+        row, col = next((i, i) for i in range(10 ** 5, 10 ** 6)
+                        if c._get_game_state(i, i) != minesweeper.GameState.mined)
+        c.try_move(row, col, minesweeper.Move.open)
+        self.assertEqual(c._get_display_state(
+            row, col), minesweeper.DisplayState.opened)
+        self.assertLessEqual(len(c._chunks), c._cache_chunks)
+        self.assertEqual(c.status(), minesweeper.GameStatus.in_progress)
+
+
+class TestUndo(unittest.TestCase):
+    def _state(self, b: minesweeper.board):
+        return [b._cell_str(i, j) for i in range(b.rows()) for j in range(b.columns())], \
+            (b._closed, b._flags, b._flagged_mines, b._lost, b.status(), b.zobrist())
+
+    def test_restore(self):
+        def mapped(rows: int, columns: int, mines: int, seed: int):
+            path = os.path.join(directory, "board")
+            minesweeper.arrayboard(rows, columns, mines, seed).save(path)
+            return minesweeper.load(path)
+
+        tests = {
+            "board": minesweeper.board,
+            "arrayboard": minesweeper.arrayboard,
+            "lazyboard": minesweeper.lazyboard,
+            "bitboard": minesweeper.bitboard,
+            "chunkedboard": lambda rows, columns, mines, seed: minesweeper.chunkedboard(
+                rows, columns, mines, seed, chunk_size=4),
+            "mappedboard": mapped,
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for name, engine in tests.items():
+                with self.subTest(name=name):
+                    rng = random.Random(11)
+                    b = engine(8, 10, 12, 3)
+                    snapshots = [(b.snapshot(), self._state(b))]
+                    # plays until the board is lost, then a few moves on the revealed board
+                    for _ in range(60):
+                        try:
+                            b.try_move(rng.randrange(8), rng.randrange(10), rng.choice(list(minesweeper.Move)))
+                        except (minesweeper.InvalidInputError, minesweeper.OpenedMine):
+                            pass
+                        snapshots.append((b.snapshot(), self._state(b)))
+                    self.assertEqual(b.status(), minesweeper.GameStatus.lost)
+
+                    for snapshot, state in reversed(snapshots):
+                        b.restore(snapshot)
+                        self.assertEqual(self._state(b), state)
+                    self.assertRaises(minesweeper.InvalidInputError, b.undo)
+
+    def test_undo(self):
+        b = minesweeper.arrayboard.from_mines(3, 4, [(0, 3)])
+        # moves are only logged once a snapshot is taken
+        b.try_move(2, 2, minesweeper.Move.flag)
+        self.assertRaises(minesweeper.InvalidInputError, b.undo)
+        self.assertIsNone(b._log)
+        b.try_move(2, 2, minesweeper.Move.clear)
+        self.assertEqual(b.snapshot(), 0)
+        b.try_move(2, 0, minesweeper.Move.open)
+        b.try_move(0, 3, minesweeper.Move.flag)
+        self.assertEqual(b.status(), minesweeper.GameStatus.won)
+        self.assertEqual(b.undo(), [(0, 3)])
+        self.assertEqual(b.status(), minesweeper.GameStatus.in_progress)
+        self.assertEqual(sorted(b.undo()), [(i, j) for i in range(3) for j in range(4) if (i, j) != (0, 3)])
+        self.assertEqual(b._closed, 12)
+
+    def test_zobrist(self):
+        # the hash kept up to date by moves and undos is the hash of the visible state computed from scratch
+        b = minesweeper.arrayboard(8, 10, 10, seed=4)
+        b.snapshot()
+        self.assertEqual(b.zobrist(), 0)
+        rng = random.Random(5)
+        hashes = {}
+        for _ in range(200):
+            if b._log and rng.random() < 0.3:
+                b.undo(rng.randint(1, len(b._log)))
+            else:
+                b._apply(rng.randrange(8), rng.randrange(10), rng.choice(list(minesweeper.Move)))
+            self.assertEqual(b.zobrist(), b._full_hash())
+            hashes.setdefault(b.zobrist(), set()).add(tuple(self._state(b)[0]))
+        # distinct visible states never share a hash
+        self.assertTrue(all(len(states) == 1 for states in hashes.values()))
+
+    def test_frontier(self):
+        # the frontier kept up to date by moves and undos is the frontier found from scratch
+        def expected(b: minesweeper.board):
+            frontier = {}
+            for i in range(b.rows()):
+                for j in range(b.columns()):
+                    if b._get_display_state(i, j) != minesweeper.DisplayState.closed:
+                        continue
+                    numbered = {cell for cell in b._adjoining(i, j)
+                                if b._get_display_state(*cell) == minesweeper.DisplayState.opened
+                                and b._get_game_state(*cell) != minesweeper.GameState.mined}
+                    if numbered:
+                        frontier[(i, j)] = numbered
+            return frontier
+
+        tests = {
+            "arrayboard": lambda: minesweeper.arrayboard(8, 10, 12, 3),
+            "lazyboard": lambda: minesweeper.lazyboard(8, 10, 12, 3),
+            "bitboard": lambda: minesweeper.bitboard(8, 10, 12, 3),
+            "hex": lambda: minesweeper.arrayboard(8, 10, 12, 3, topology=minesweeper.Topology.hex),
+        }
+        for name, engine in tests.items():
+            with self.subTest(name=name):
+                b = engine()
+                b.snapshot()
+                self.assertEqual(b.frontier(), {})
+                rng = random.Random(6)
+                for _ in range(300):
+                    if b._log and rng.random() < 0.3:
+                        b.undo(rng.randint(1, len(b._log)))
+                    else:
+                        b._apply(rng.randrange(8), rng.randrange(10), rng.choice(list(minesweeper.Move)))
+                    frontier = expected(b)
+                    self.assertEqual(b.frontier(), frontier)
+                    constraints = {}
+                    for cell, numbered in frontier.items():
+                        for adj in numbered:
+                            constraints.setdefault(adj, set()).add(cell)
+                    self.assertEqual(b.constraints(), constraints)
+                    # the closed cells off the frontier are counted per row
+                    off = [(i, j) for i in range(8) for j in range(10) if (i, j) not in frontier
+                           and b._get_display_state(i, j) == minesweeper.DisplayState.closed]
+                    self.assertEqual(b._off_rows, {row: sum(i == row for i, _ in off) for row, _ in off})
+                    if off:
+                        self.assertIn(b._closed_off_frontier(), off)
+                    else:
+                        self.assertIsNone(b._closed_off_frontier())
+
+
+class TestBoardFile(unittest.TestCase):
+    def test_seed(self):
+        tests = {
+            "int-seed": {
+                "seeds": (42, 42),
+                "same": True,
+            },
+            "random-instance": {
+                "seeds": (random.Random(7), random.Random(7)),
+                "same": True,
+            },
+            "different-seeds": {
+                "seeds": (1, 2),
+                "same": False,
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                first, second = [minesweeper.arrayboard(
+                    16, 30, 99, seed) for seed in test["seeds"]]
+                self.assertEqual(first._game_states ==
+                                 second._game_states, test["same"])
+        # game boards place their mines on the first open, from the seed and the opened cell
+        games = [minesweeper.game("d", seed=5) for _ in range(2)]
+        for g in games:
+            self.assertIsNone(g.board._mine_cells)
+            g.board.try_move(3, 4, minesweeper.Move.open)
+        self.assertEqual(games[0].board._mine_cells, games[1].board._mine_cells)
+
+    def test_save_load(self):
+        def flagAndOpen(b: minesweeper.board):
+            b.try_move(*b._mine_cells[0], minesweeper.Move.flag)
+            b.try_move(0, 1, minesweeper.Move.flag)
+            for i in range(b.rows()):
+                for j in range(b.columns()):
+                    if b._get_game_state(i, j) == minesweeper.GameState.clear and \
+                            b._get_display_state(i, j) == minesweeper.DisplayState.closed:
+                        b.try_move(i, j, minesweeper.Move.open)
+                        return
+
+        def openMine(b: minesweeper.board):
+            self.assertRaises(minesweeper.OpenedMine, b.try_move,
+                              *b._mine_cells[0], minesweeper.Move.open)
+
+        tests = {
+            "new-board": {
+                "engine": minesweeper.board,
+                "setup": None,
+            },
+            "board-in-progress": {
+                "engine": minesweeper.board,
+                "setup": flagAndOpen,
+            },
+            "arrayboard-in-progress": {
+                "engine": minesweeper.arrayboard,
+                "setup": flagAndOpen,
+            },
+            "arrayboard-lost": {
+                "engine": minesweeper.arrayboard,
+                "setup": openMine,
+            },
+            "hex-arrayboard-in-progress": {
+                "engine": functools.partial(minesweeper.arrayboard, topology=minesweeper.Topology.hex),
+                "setup": flagAndOpen,
+            },
+        }
+        for name, test in tests.items():
+            for mapped in (True, False):
+                with self.subTest(name=name, mapped=mapped), tempfile.TemporaryDirectory() as d:
+                    b = test["engine"](rows=9, columns=13, mines=20, seed=3)
+                    if test["setup"] is not None:
+                        test["setup"](b)
+                    path = os.path.join(d, "board")
+                    b.save(path)
+                    loaded = minesweeper.load(path, mapped)
+                    self.assertEqual((loaded.rows(), loaded.columns(), loaded.mines(), loaded._topology),
+                                     (b.rows(), b.columns(), b.mines(), b._topology))
+                    self.assertEqual((loaded._flags, loaded._closed, loaded._flagged_mines, loaded.status()),
+                                     (b._flags, b._closed, b._flagged_mines, b.status()))
+                    for i in range(b.rows()):
+                        for j in range(b.columns()):
+                            self.assertEqual(loaded._get_game_state(
+                                i, j), b._get_game_state(i, j))
+                            self.assertEqual(loaded._get_display_state(
+                                i, j), b._get_display_state(i, j))
+
+                    # moves on the loaded board leave the file unchanged
+                    with open(path, "rb") as f:
+                        saved = f.read()
+                    if loaded.status() == minesweeper.GameStatus.in_progress:
+                        flagged = loaded._get_display_state(
+                            0, 1) == minesweeper.DisplayState.flagged
+                        loaded.try_move(
+                            0, 1, minesweeper.Move.clear if flagged else minesweeper.Move.flag)
+                        self.assertNotEqual(loaded._get_display_state(
+                            0, 1), b._get_display_state(0, 1))
+                    with open(path, "rb") as f:
+                        self.assertEqual(f.read(), saved)
+
+    def test_load_invalid_file(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "board")
+            with open(path, "wb") as f:
+                f.write(bytes(64))
+            self.assertRaisesRegex(minesweeper.InvalidInputError,
+                                   "not a board file", minesweeper.load, path)
+
+
+class TestEngine(unittest.TestCase):
+    def test_apply_moves(self):
+        ok = minesweeper.MoveResult.ok.value
+        tests = {
+            "valid-moves": {
+                "moves": lambda mine, safe: [(mine[0], mine[1], minesweeper.Move.flag), (mine[0], mine[1], minesweeper.Move.clear), (safe[0], safe[1], minesweeper.Move.open)],
+                "results": [ok, ok, ok],
+                "changed": lambda mine, safe: {mine, safe},
+            },
+            "invalid-cell": {
+                "moves": lambda mine, safe: [(-1, 0, minesweeper.Move.open), (0, 7, minesweeper.Move.flag)],
+                "results": [minesweeper.MoveResult.invalid_cell.value] * 2,
+                "changed": lambda mine, safe: set(),
+            },
+            "invalid-move": {
+                "moves": lambda mine, safe: [(safe[0], safe[1], minesweeper.Move.clear), (safe[0], safe[1], minesweeper.Move.open), (safe[0], safe[1], minesweeper.Move.open)],
+                "results": [minesweeper.MoveResult.invalid_move.value, ok, minesweeper.MoveResult.invalid_move.value],
+                "changed": lambda mine, safe: {safe},
+            },
+            "no-flags": {
+                "moves": lambda mine, safe: [(mine[0], mine[1], minesweeper.Move.flag), (safe[0], safe[1], minesweeper.Move.flag)],
+                "results": [ok, minesweeper.MoveResult.no_flags.value],
+                "changed": lambda mine, safe: {mine},
+            },
+            "mine-ends-game": {
+                "moves": lambda mine, safe: [(mine[0], mine[1], minesweeper.Move.open), (safe[0], safe[1], minesweeper.Move.open)],
+                "results": [minesweeper.MoveResult.mine.value, minesweeper.MoveResult.game_over.value],
+                "changed": lambda mine, safe: {(i, j) for i in range(2) for j in range(2)},
+            },
+        }
+        for name, test in tests.items():
+            for board in (minesweeper.board, minesweeper.arrayboard):
+                with self.subTest(name=name, engine=board.__name__):
+                    e = minesweeper.engine(board(rows=2, columns=2, mines=1))
+                    mine = e.board._mine_cells[0]
+                    safe = (1 - mine[0], mine[1])
+                    results, changed = e.apply_moves(
+                        test["moves"](mine, safe))
+                    self.assertEqual(list(results), test["results"])
+                    self.assertEqual(changed, test["changed"](mine, safe))
+
+
+class TestRenderer(unittest.TestCase):
+    class output(io.StringIO):
+        writes = 0
+
+        def write(self, text):
+            self.writes += 1
+            return super().write(text)
+
+    def test_draw(self):
+        def flag(b: minesweeper.board):
+            b.try_move(0, 0, minesweeper.Move.flag)
+            return b._last_changed
+
+        def noMove(b: minesweeper.board):
+            return []
+
+        def unchangedCell(b: minesweeper.board):
+            return [(1, 1)]
+
+        tests = {
+            "flag": {
+                "move": flag,
+                "drawn": {(0, 0): "\u26F3 "},
+            },
+            "no-move": {
+                "move": noMove,
+                "drawn": {},
+            },
+            "unchanged-cell": {
+                "move": unchangedCell,
+                "drawn": {},
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                b = minesweeper.arrayboard(rows=4, columns=12, mines=3, seed=1)
+                out = self.output()
+                r = minesweeper.renderer(b, out)
+                r.draw([])
+                full = out.getvalue()
+                self.assertEqual(full.count("\u25C9"), 4 * 12)
+                self.assertIn("3 flags remaining", full)
+
+                out.seek(0)
+                out.truncate()
+                out.writes = 0
+                changed = test["move"](b)
+                r.draw(changed, "message")
+                frame = out.getvalue()
+                self.assertEqual(out.writes, 1)
+                self.assertIn("message", frame)
+                self.assertIn("{} flags remaining".format(b._flags), frame)
+                cells = frame.count("H") - 2  # minus the flags and message lines
+                self.assertEqual(cells, len(test["drawn"]))
+                for (row, col), symbol in test["drawn"].items():
+                    self.assertIn(r._move_to(row + 2, r._label_width + col * r._cell_width) + symbol, frame)
+
+    def test_redraw(self):
+        b = minesweeper.arrayboard(rows=3, columns=3, mines=0)
+        out = io.StringIO()
+        r = minesweeper.renderer(b, out)
+        r.draw([])
+        b.try_move(0, 0, minesweeper.Move.open)
+        r.redraw()
+        self.assertEqual(out.getvalue().count("\x1b[2J"), 2)
+        self.assertEqual(out.getvalue().split("\x1b[2J")[-1].count("\u25EF"), 9)
+
+
+    def test_viewport(self):
+        tests = {
+            "initial": {
+                "moves": [],
+                "window": (0, 0),
+            },
+            "pan": {
+                "moves": [("pan", 5, 7)],
+                "window": (5, 7),
+            },
+            "pan-past-the-edge": {
+                "moves": [("pan", 500, -3)],
+                "window": (90, 0),
+            },
+            "jump": {
+                "moves": [("jump", 50, 60)],
+                "window": (45, 56),
+            },
+            "jump-to-corner": {
+                "moves": [("jump", 99, 99)],
+                "window": (90, 92),
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                b = minesweeper.arrayboard(rows=100, columns=100, mines=0)
+                b._flags = 2
+                out = io.StringIO()
+                r = minesweeper.renderer(b, out, height=10, width=8)
+                r.draw([])
+                for command, row, col in test["moves"]:
+                    getattr(r, command)(row, col)
+                self.assertEqual(r.to_board(0, 0), test["window"])
+                self.assertEqual(r.to_board(2, 3), (test["window"][0] + 2, test["window"][1] + 3))
+                # only the cells in the window are drawn
+                frame = out.getvalue().split("\x1b[2J")[-1]
+                self.assertEqual(frame.count("\u25C9"), 10 * 8)
+                self.assertIn("rows {}-{} of 100".format(test["window"][0], test["window"][0] + 9), frame)
+
+                out.seek(0)
+                out.truncate()
+                top, left = test["window"]
+                b.try_move(top, left, minesweeper.Move.flag)
+                b.try_move(99 - top, 99 - left, minesweeper.Move.flag)
+                r.draw([(top, left), (99 - top, 99 - left)])
+                self.assertEqual(out.getvalue().count("\u26F3"), 1)
+
 class TestCell(unittest.TestCase):
     def test_str(self):
         tests = {
@@ -0,0 +1,48 @@
+import concurrent.futures
+import random
+import time
+import unittest
+import minesweeper
+import noguess
+import solver
+
+
+class TestNoGuess(unittest.TestCase):
+    def test_generate(self):
+        for difficulty, (rows, columns, mines) in minesweeper.PRESETS.items():
+            with self.subTest(difficulty=difficulty):
+                mine_cells, first, attempts = noguess.generate(rows, columns, mines, random.Random(1))
+                self.assertEqual(len(set(mine_cells)), mines)
+                self.assertNotIn(first, mine_cells)
+                self.assertGreaterEqual(attempts, 1)
+
+    def test_pregenerator(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        with noguess.pregenerator(("e", "medium"), depth=2, executor=executor, seed=2) as boards:
+            for difficulty in ("easy", "M"):
+                with self.subTest(difficulty=difficulty):
+                    g = minesweeper.game(difficulty, boards=boards)
+                    b = g.board
+                    self.assertEqual((b.rows(), b.columns(), b.mines()),
+                                     minesweeper.PRESETS[minesweeper._preset(difficulty)])
+                    self.assertEqual(b._get_display_state(b.rows() // 2, b.columns() // 2),
+                                     minesweeper.DisplayState.opened)
+                    solver.solver(b).solve()
+                    self.assertEqual(b.status(), minesweeper.GameStatus.won)
+            self.assertRaises(minesweeper.InvalidInputError, boards.take, "difficult")
+            self.assertRaises(minesweeper.InvalidInputError, boards.take, "x")
+
+            deadline = time.monotonic() + 60
+            while boards.metrics()["easy"]["depth"] < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            metrics = boards.metrics()
+            self.assertEqual(metrics["easy"]["depth"], 2)
+            self.assertEqual(metrics["easy"]["capacity"], 2)
+            self.assertGreaterEqual(metrics["easy"]["generated"], 3)
+            self.assertGreater(metrics["easy"]["boards_per_second"], 0)
+            self.assertTrue(0 < metrics["easy"]["acceptance_rate"] <= 1)
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
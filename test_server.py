@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+import server
+
+
+class TestServer(unittest.TestCase):
+    def test_execute(self):
+        tests = {
+            "no-game": {
+                "requests": ["move 0 0", "render", "resign"],
+                "answers": ["error no game", "error no game", "error no game"],
+                "sessions": 0,
+            },
+            "invalid-requests": {
+                "requests": ["", "jump", "new x", "new 2x2x4", "new easy 1", "move 0", "move 0 0 dig"],
+                "answers": ["error empty", "error unknown", "error invalid", "error invalid", "ok 1 8 10 10",
+                            "error invalid", "error invalid"],
+                "sessions": 1,
+            },
+            "play": {
+                "requests": ["new 2x3x1 1", "move 0 0", "move 0 0", "move 1 2 flag", "move 0 5", "render", "resign",
+                             "render"],
+                "answers": ["ok 1 2 3 1", "ok ok in_progress 1 0,0,", "ok invalid_move in_progress 1",
+                            "ok ok in_progress 0 1,2,⛳", "ok invalid_cell in_progress 0", "ok 2 3\n",
+                            "ok lost", "error no game"],
+                "sessions": 0,
+            },
+            "rejected-new": {
+                "requests": ["new 10x10x5 3", "new 10x10x100", "new 200x10x5", "new expert", "new easy x",
+                             "move 0 0", "resign"],
+                "answers": ["ok 1 10 10 5", "error invalid", "error board too large", "error invalid",
+                            "error invalid", "ok ok", "ok lost"],
+                "sessions": 0,
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                s = server.server()
+                session = None
+                for request, answer in zip(test["requests"], test["answers"]):
+                    session, got = s.execute(session, request)
+                    self.assertTrue(got.startswith(answer), got)
+                self.assertEqual(s.sessions(), test["sessions"])
+
+    def test_max_sessions(self):
+        s = server.server(max_sessions=2)
+        first, _ = s.execute(None, "new")
+        second, _ = s.execute(None, "new")
+        self.assertEqual(s.execute(None, "new"), (None, "error too many sessions"))
+        # a new game replaces the game of its connection
+        self.assertEqual(s.execute(second, "new e 3"), (3, "ok 3 8 10 10"))
+        self.assertEqual(s.sessions(), 2)
+
+    def test_limits(self):
+        s = server.server(max_rows=100, max_columns=200)
+        self.assertEqual(s.execute(None, "new 101x10x5"), (None, "error board too large: at most 100x200"))
+        self.assertEqual(s.execute(None, "new 10x201x5"), (None, "error board too large: at most 100x200"))
+        session, _ = s.execute(None, "new 100x200x1 1")
+        # renders answer with a window of the board
+        tests = {
+            "first-cell": ("render", server.RENDER_ROWS, server.RENDER_COLUMNS),
+            "inside": ("render 10 20", server.RENDER_ROWS, server.RENDER_COLUMNS),
+            "last-cells": ("render 90 190", 10, 10),
+        }
+        for name, (request, rows, columns) in tests.items():
+            with self.subTest(name=name):
+                _, answer = s.execute(session, request)
+                lines = answer.split("\n")
+                self.assertEqual(lines[0], "ok 100 200")
+                self.assertEqual([len(line) for line in lines[1:]], [columns] * rows)
+        self.assertTrue(s.execute(session, "render 100 0")[1].startswith("error invalid"))
+
+    def test_load(self):
+        async def run():
+            s = server.server(idle_timeout=0.2)
+            tcp = await s.serve("127.0.0.1", 0)
+            port = tcp.sockets[0].getsockname()[1]
+            result = await server.load("127.0.0.1", port, sessions=20, moves=15, seed=1)
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"new\n")
+            await reader.readline()
+            idle = await reader.readline()
+            writer.close()
+            sessions = s.sessions()
+            tcp.close()
+            await tcp.wait_closed()
+            return result, idle, sessions
+
+        result, idle, sessions = asyncio.run(run())
+        self.assertEqual(result["sessions"], 20)
+        self.assertEqual(result["moves"], 300)
+        self.assertLessEqual(result["p50"], result["p99"])
+        self.assertGreater(result["moves_per_second"], 0)
+        self.assertGreater(result["sessions_per_core"], 0)
+        self.assertEqual(idle, b"error idle timeout\n")
+        self.assertEqual(sessions, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import simulate
+
+
+class TestSimulate(unittest.TestCase):
+    def test_simulate(self):
+        tests = {
+            "solver-in-process": {
+                "strategy": simulate.solver_strategy,
+                "workers": 1,
+            },
+            "solver-process-pool": {
+                "strategy": simulate.solver_strategy,
+                "workers": 2,
+            },
+            "random-process-pool": {
+                "strategy": simulate.random_strategy,
+                "workers": 2,
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                summaries = list(simulate.simulate(games=25, rows=8, columns=10, mines=10, strategy=test["strategy"],
+                                                   workers=test["workers"], seed=3, chunk=10))
+                self.assertEqual([s["games"] for s in summaries], [10, 20, 25] if test["workers"] == 1
+                                 else sorted(s["games"] for s in summaries))
+                final = summaries[-1]
+                self.assertEqual(final["games"], 25)
+                self.assertGreaterEqual(final["moves_per_game"], 1)
+                self.assertGreaterEqual(final["guesses_per_game"], 1)
+                self.assertLessEqual(final["guesses_per_game"], final["moves_per_game"])
+                self.assertTrue(0 <= final["win_rate"] <= 1)
+
+    def test_simulate_is_reproducible(self):
+        # chunks are seeded by their index, so results do not depend on the number of workers
+        results = []
+        for workers in (1, 3):
+            final = list(simulate.simulate(games=30, rows=8, columns=10, mines=10, workers=workers,
+                                           seed=11, chunk=7))[-1]
+            results.append((final["wins"], final["moves_per_game"], final["guesses_per_game"]))
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
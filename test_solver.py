@@ -0,0 +1,263 @@
+import itertools
+import unittest
+import minesweeper
+import random
+import solver
+
+
+def _board(layout: list, opened: list = ()):
+    ''' builds an arrayboard from rows of "*" (mined) and "." (clear) cells, with the specified cells opened '''
+    rows, columns = len(layout), len(layout[0])
+    mine_cells = [(i, j) for i in range(rows)
+                  for j in range(columns) if layout[i][j] == "*"]
+    b = minesweeper.arrayboard.from_mines(rows, columns, mine_cells)
+    for row, col in opened:
+        b._set_display_state(row, col, minesweeper.DisplayState.opened)
+        b._closed -= 1
+    return b
+
+
+class TestSolver(unittest.TestCase):
+    def test_moves(self):
+        tests = {
+            "nothing-opened": {
+                "layout": ["*..",
+                           "..."],
+                "opened": [],
+                "moves": [],
+            },
+            "single-cell-mined": {
+                "layout": ["..*"],
+                "opened": [(0, 0), (0, 1)],
+                "moves": [(0, 2, minesweeper.Move.flag)],
+            },
+            "single-cell-safe": {
+                "layout": ["*..",
+                           "..."],
+                "opened": [(1, 2)],
+                "moves": [(0, 1, minesweeper.Move.open), (0, 2, minesweeper.Move.open), (1, 1, minesweeper.Move.open)],
+            },
+            "subset": {
+                "layout": ["*..",
+                           "..."],
+                "opened": [(1, 0), (1, 1)],
+                "moves": [(0, 2, minesweeper.Move.open), (1, 2, minesweeper.Move.open)],
+            },
+            "undecidable": {
+                "layout": ["*.",
+                           ".."],
+                "opened": [(1, 1)],
+                "moves": [],
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                s = solver.solver(_board(test["layout"], test["opened"]))
+                self.assertEqual(s.moves(), test["moves"])
+
+    def test_solve(self):
+        # every move played by the solver must be right, and it must win the games it does not get stuck in
+        rng = random.Random(7)
+        for game in range(30):
+            with self.subTest(game=game):
+                b = minesweeper.arrayboard(20, 24, 60)
+                safe = [(i, j) for i in range(20) for j in range(24)
+                        if b._get_game_state(i, j) == minesweeper.GameState.clear]
+                b.try_move(*rng.choice(safe), minesweeper.Move.open)
+                s = solver.solver(b)
+                s.solve()
+                self.assertNotEqual(b.status(), minesweeper.GameStatus.lost)
+                self.assertEqual(b._flagged_mines, b._mines - b._flags)
+                if b.status() == minesweeper.GameStatus.in_progress:
+                    self.assertEqual(s.moves(), [])
+
+    def test_solve_topologies(self):
+        rng = random.Random(8)
+        for topology in minesweeper.Topology:
+            for game in range(5):
+                with self.subTest(topology=topology.name, game=game):
+                    b = minesweeper.lazyboard(12, 14, 25, rng, topology)
+                    b.try_move(6, 7, minesweeper.Move.open)
+                    s = solver.solver(b)
+                    s.solve()
+                    self.assertNotEqual(b.status(), minesweeper.GameStatus.lost)
+                    self.assertEqual(b._flagged_mines, b._mines - b._flags)
+
+    def test_probabilities(self):
+        def bruteForce(b: minesweeper.board, s: solver.solver):
+            # count every arrangement of the mines left over the cells not known yet that matches the visible numbers
+            closed = [(i, j) for i in range(b.rows()) for j in range(b.columns())
+                      if b._get_display_state(i, j) == minesweeper.DisplayState.closed and (i, j) not in s._safe and (i, j) not in s._mined]
+            known = {(i, j) for i in range(b.rows()) for j in range(b.columns())
+                     if b._get_display_state(i, j) == minesweeper.DisplayState.flagged} | s._mined
+            numbered = {(i, j): b._get_game_state(i, j) for i in range(b.rows()) for j in range(b.columns())
+                        if s._is_numbered(i, j)}
+            mined_counts = dict.fromkeys(closed, 0)
+            total = 0
+            for mines in itertools.combinations(closed, b.mines() - len(known)):
+                mines = set(mines) | known
+                if all(len(mines & set(s._adjoining(*cell))) == (0 if number == minesweeper.GameState.clear else number)
+                       for cell, number in numbered.items()):
+                    total += 1
+                    for cell in mines - known:
+                        mined_counts[cell] += 1
+            return {cell: count / total for cell, count in mined_counts.items()}
+
+        tests = {
+            "layout-1": {
+                "layout": ["*...",
+                           "....",
+                           "..*.",
+                           "*...",
+                           "...*"],
+                "opened": [(0, 2), (0, 3), (1, 2), (1, 3), (1, 1), (0, 1)],
+            },
+            "layout-2": {
+                "layout": ["..*..",
+                           ".....",
+                           "*...*",
+                           "....."],
+                "opened": [(3, 1), (3, 2), (3, 3), (2, 2), (1, 2)],
+            },
+            "nothing-opened": {
+                "layout": ["*..",
+                           "..*"],
+                "opened": [],
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                b = _board(test["layout"], test["opened"])
+                s = solver.solver(b)
+                s.moves()
+                probabilities, others = s.probabilities()
+                expected = bruteForce(b, s)
+                for cell, probability in expected.items():
+                    self.assertAlmostEqual(probabilities.get(
+                        cell, others), probability, msg=str(cell))
+                self.assertIn(s.guess(), expected)
+                self.assertEqual(expected[s.guess()], min(expected.values()))
+
+    def test_transpositions(self):
+        table = solver.transpositions(capacity=2)
+        table.put(1, "a")
+        table.put(2, "b")
+        self.assertEqual(table.get(1), "a")
+        table.put(3, "c")
+        self.assertIsNone(table.get(2))
+        self.assertEqual(table.get(3), "c")
+        self.assertEqual(table.stats(), {"size": 2, "capacity": 2, "hits": 2, "misses": 1, "evictions": 1,
+                                         "hit_rate": 2 / 3})
+
+        # the same pattern of constraints is only counted once, wherever it is on the board
+        table = solver.transpositions()
+        layouts = {
+            "left": (["*..*...",
+                      ".......",
+                      "...*..."], [(1, 1), (1, 2)]),
+            "shifted": (["...*..*",
+                         ".......",
+                         "......*"], [(1, 4), (1, 5)]),
+        }
+        for name, (layout, opened) in layouts.items():
+            with self.subTest(name=name):
+                b = _board(layout, opened)
+                self.assertEqual(solver.solver(b, table).probabilities(), solver.solver(b).probabilities())
+        self.assertGreaterEqual(table.stats()["hits"], 1)
+
+        # a position seen before an undo is looked up instead of computed again
+        b = _board(["*..*...",
+                    ".......",
+                    "...*..."])
+        b.snapshot()
+        b.try_move(2, 0, minesweeper.Move.open)
+        s = solver.solver(b, table)
+        before = s.probabilities()
+        b.try_move(0, 5, minesweeper.Move.open)
+        s = solver.solver(b, table)
+        s.probabilities()
+        b.undo()
+        hits = table.stats()["hits"]
+        self.assertEqual(solver.solver(b, table).probabilities(), before)
+        self.assertEqual(table.stats()["hits"], hits + 1)
+
+        # a solver that did not observe the moves played stores the probabilities of the position it is asked in
+        table = solver.transpositions()
+        b = minesweeper.arrayboard(16, 16, 40, 3)
+        s = solver.solver(b, table)
+        s.probabilities()
+        for row, col in [(8, 8), (0, 0), (15, 15), (0, 15)]:
+            if b._get_display_state(row, col) == minesweeper.DisplayState.closed and \
+                    b._get_game_state(row, col) != minesweeper.GameState.mined:
+                b.try_move(row, col, minesweeper.Move.open)
+            self.assertEqual(s.probabilities(), solver.solver(b).probabilities())
+            self.assertEqual(solver.solver(b, table).probabilities(), solver.solver(b).probabilities())
+
+    def test_hint(self):
+        tests = {
+            "safe-cell": {
+                "layout": ["*..",
+                           "..."],
+                "opened": [(1, 2)],
+                "cells": [(0, 1)],
+                "probability": 0.0,
+            },
+            "only-mines-left": {
+                "layout": ["..*"],
+                "opened": [(0, 0), (0, 1)],
+                "cells": None,
+            },
+            "nothing-opened": {
+                "layout": ["*..",
+                           "..*"],
+                "opened": [],
+                "cells": [(i, j) for i in range(2) for j in range(3)],
+                "probability": 1 / 3,
+            },
+            "off-the-frontier": {
+                # the only mine adjoins the opened number, so every cell off the frontier is safe
+                "layout": ["*....",
+                           ".....",
+                           "....."],
+                "opened": [(0, 1)],
+                "cells": [(i, j) for i in range(3) for j in range(5) if i == 2 or j > 2],
+                "probability": 0.0,
+            },
+        }
+        for name, test in tests.items():
+            with self.subTest(name=name):
+                b = _board(test["layout"], test["opened"])
+                hint = solver.solver(b).hint()
+                if test["cells"] is None:
+                    self.assertIsNone(hint)
+                    continue
+                row, col, probability = hint
+                self.assertIn((row, col), test["cells"])
+                self.assertAlmostEqual(probability, test["probability"])
+
+        # hints follow the moves played on the board, without observing them, from a solver made before the first move
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                b = minesweeper.arrayboard(16, 16, 40, seed)
+                s = solver.solver(b)
+                while b.status() == minesweeper.GameStatus.in_progress:
+                    row, col, probability = s.hint()
+                    self.assertEqual(b._get_display_state(row, col), minesweeper.DisplayState.closed)
+                    if probability == 0.0:
+                        self.assertNotEqual(b._get_game_state(row, col), minesweeper.GameState.mined)
+                    try:
+                        b.try_move(row, col, minesweeper.Move.open)
+                    except minesweeper.OpenedMine:
+                        pass
+                    if b._flags == b._closed:
+                        # the cells left are all mined
+                        break
+
+        # no hint once the board is revealed
+        b = _board(["*.."])
+        self.assertRaises(minesweeper.OpenedMine, b.try_move, 0, 0, minesweeper.Move.open)
+        self.assertIsNone(solver.solver(b).hint())
+
+
+if __name__ == "__main__":
+    unittest.main()